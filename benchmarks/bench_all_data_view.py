@@ -0,0 +1,81 @@
+"""Benchmark: All Data view refresh, sort and scroll times.
+
+Usage: python benchmarks/bench_all_data_view.py [sizes...]   (default: 10000 100000 1000000)
+
+For every size a throwaway database is filled with synthetic rows. The old
+refresh (loading every matching row) is timed once, then for each filter and
+sort key the virtual view's work is timed: opening the view (row count plus
+the first page), jumping to the middle with the scrollbar, scrolling on by a
+page from there and jumping to the end of the result. Only database work is measured; the view itself never holds more
+Treeview items than fit on screen.
+"""
+import os
+import sys
+import time
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+import virtual_table
+
+ROWS_PER_IMAGE = 20
+USERNAMES = 5000
+VISIBLE_ROWS = 30
+
+
+def populate(total_rows):
+    num_images = max(1, total_rows // ROWS_PER_IMAGE)
+    start_date = datetime.datetime(2025, 1, 1)
+    with database.transaction() as cursor:
+        image_ids = [database.add_image(f"/synthetic/image_{i}.png", b"\x89PNG") for i in range(num_images)]
+        cursor.executemany("INSERT INTO extracted_data (image_id, username, level, class, friend, extracted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                           ((image_ids[n // ROWS_PER_IMAGE], f"User{(n * 7919) % USERNAMES}", n % 300,
+                             ("Valkyrie", "mage", "Ranger")[n % 3], n % 2,
+                             str(start_date + datetime.timedelta(minutes=n // ROWS_PER_IMAGE)))
+                            for n in range(num_images * ROWS_PER_IMAGE)))
+
+
+def make_source(most_recent_only, order_by):
+    def fetch(offset, limit, reverse, after=None):
+        return database.query_extracted_data(most_recent_only=most_recent_only, order_by=order_by,
+                                             descending=not reverse, limit=limit, offset=offset,
+                                             after_id=after[0] if after is not None else None)
+    return virtual_table.PagedRowSource(fetch, lambda: database.count_extracted_data(most_recent_only=most_recent_only))
+
+
+def timed_ms(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            database.close_db()
+            database.DB_NAME = os.path.join(tmp, f"bench_{size}.db")
+            database.init_db()
+            populate(size)
+
+            print(f"\n{size:,} rows")
+            print(f"full load (old refresh):       {timed_ms(database.query_extracted_data):10.1f} ms")
+            print(f"full load, most recent only:   {timed_ms(lambda: database.query_extracted_data(most_recent_only=True)):10.1f} ms")
+            print(f"{'view':<30} {'open (ms)':>10} {'jump (ms)':>10} {'scroll (ms)':>12} {'end (ms)':>10}")
+            for most_recent_only in (False, True):
+                for order_by in database.EXTRACTED_DATA_SORT_KEYS:
+                    source = make_source(most_recent_only, order_by)
+                    middle = len(source) // 2
+                    opened = timed_ms(lambda: source.rows(0, VISIBLE_ROWS))
+                    jump = timed_ms(lambda: source.rows(middle, middle + VISIBLE_ROWS))
+                    # Scrolling on past the cached page continues from its last row
+                    scroll = timed_ms(lambda: source.rows(middle + source.page_size, middle + source.page_size + VISIBLE_ROWS))
+                    end = timed_ms(lambda: source.rows(len(source) - VISIBLE_ROWS, len(source)))
+                    label = f"{order_by}{', most recent' if most_recent_only else ''}"
+                    print(f"{label:<30} {opened:>10.1f} {jump:>10.1f} {scroll:>12.1f} {end:>10.1f}")
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: extracted_data insert throughput (rows/second).
+
+Usage: python benchmarks/bench_db_insert.py [total_rows]
+
+Compares the legacy row-at-a-time path (one commit per row) with
+replace_extracted_data (one transaction per image) and
+replace_extracted_data_many (one transaction for the whole batch) on a
+synthetic data set, using a throwaway database file.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+ROWS_PER_IMAGE = 50
+LEGACY_SAMPLE_ROWS = 5000 # The legacy path is slow; time a sample and extrapolate
+
+
+def make_rows(count, offset=0):
+    return [(f"user{offset + i}", (offset + i) % 300, "Valkyrie", bool(i % 2)) for i in range(count)]
+
+
+def use_fresh_db(directory, name):
+    database.close_db()
+    database.DB_NAME = os.path.join(directory, name)
+    database.init_db()
+
+
+def create_images(count):
+    with database.transaction():
+        return [database.add_image(f"/synthetic/image_{i}.png", b"\x89PNG") for i in range(count)]
+
+
+def legacy_add_extracted_data(image_id, username, level, class_name, friend):
+    """The removed database.add_extracted_data: one INSERT and one commit per row."""
+    with database.transaction() as cursor:
+        cursor.execute(database.INSERT_EXTRACTED_DATA_SQL, (image_id, username, level, class_name, 1 if friend else 0))
+
+
+def report(label, rows, seconds):
+    print(f"{label:<40} {rows:>9} rows  {seconds:8.3f}s  {rows / seconds:>12,.0f} rows/s")
+
+
+def main():
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    num_images = max(1, total_rows // ROWS_PER_IMAGE)
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Legacy: clear + one INSERT per row, each with its own commit
+        use_fresh_db(tmp, "legacy.db")
+        image_ids = create_images(max(1, LEGACY_SAMPLE_ROWS // ROWS_PER_IMAGE))
+        start = time.perf_counter()
+        for n, image_id in enumerate(image_ids):
+            database.clear_extracted_data_for_image(image_id)
+            for username, level, class_name, friend in make_rows(ROWS_PER_IMAGE, n * ROWS_PER_IMAGE):
+                legacy_add_extracted_data(image_id, username, level, class_name, friend)
+        report("legacy per-row insert (sample)", len(image_ids) * ROWS_PER_IMAGE, time.perf_counter() - start)
+
+        # 2. replace_extracted_data: one transaction per image
+        use_fresh_db(tmp, "per_image.db")
+        image_ids = create_images(num_images)
+        start = time.perf_counter()
+        for n, image_id in enumerate(image_ids):
+            database.replace_extracted_data(image_id, make_rows(ROWS_PER_IMAGE, n * ROWS_PER_IMAGE))
+        report("replace_extracted_data (per image)", num_images * ROWS_PER_IMAGE, time.perf_counter() - start)
+
+        # 3. replace_extracted_data_many: the whole folder in one transaction
+        use_fresh_db(tmp, "many.db")
+        image_ids = create_images(num_images)
+        items = [(image_id, make_rows(ROWS_PER_IMAGE, n * ROWS_PER_IMAGE)) for n, image_id in enumerate(image_ids)]
+        start = time.perf_counter()
+        database.replace_extracted_data_many(items)
+        report("replace_extracted_data_many (one txn)", num_images * ROWS_PER_IMAGE, time.perf_counter() - start)
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
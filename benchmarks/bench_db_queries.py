@@ -0,0 +1,104 @@
+"""Benchmark: extracted_data query times before and after the index migration.
+
+Usage: python benchmarks/bench_db_queries.py [sizes...]   (default: 10000 100000 1000000)
+
+For every size a throwaway database is created at schema version 1 (no
+indexes) and filled with synthetic rows. The hot queries are timed, the file is
+then upgraded in place with init_db() and the same queries are timed again.
+"""
+import os
+import sys
+import time
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+ROWS_PER_IMAGE = 20
+REPEATS = 20
+
+# get_all_extracted_data before schema 5 (the current query needs extracted_ts)
+BASELINE_ALL_EXTRACTED_DATA_SQL = """
+    SELECT d.id, d.image_id, i.file_path, d.username, d.level, d.class, d.friend, d.extracted_at
+    FROM extracted_data d
+    JOIN images i ON d.image_id = i.id
+    ORDER BY d.extracted_at DESC
+"""
+
+
+def populate(total_rows):
+    num_images = max(1, total_rows // ROWS_PER_IMAGE)
+    start_date = datetime.datetime(2025, 1, 1)
+    with database.transaction() as cursor:
+        cursor.executemany("INSERT INTO images (file_path, image_data, added_at) VALUES (?, ?, ?)",
+                           ((f"/synthetic/image_{i}.png", b"\x89PNG", str(start_date + datetime.timedelta(minutes=i)))
+                            for i in range(num_images)))
+        cursor.executemany("INSERT INTO extracted_data (image_id, username, level, class, friend, extracted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                           ((n // ROWS_PER_IMAGE + 1, f"user{n % 5000}", n % 300, "Valkyrie", n % 2,
+                             str(start_date + datetime.timedelta(minutes=n // ROWS_PER_IMAGE)))
+                            for n in range(num_images * ROWS_PER_IMAGE)))
+    return num_images
+
+
+def timed(func, repeats=REPEATS):
+    start = time.perf_counter()
+    for i in range(repeats):
+        func(i)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def delete_and_roll_back(image_id):
+    conn = database.get_connection()
+    conn.execute("BEGIN")
+    conn.execute(database.DELETE_EXTRACTED_DATA_SQL, (image_id,))
+    conn.rollback()
+
+
+def run_queries(num_images):
+    conn = database.get_connection()
+    image_id = lambda i: (i * 7919) % num_images + 1
+    # Schema 5 sorts dates by the integer extracted_ts
+    sort_keys = database.get_schema_version() >= 5
+    date_column = "extracted_ts" if sort_keys else "extracted_at"
+    if sort_keys:
+        get_all_extracted_data = database.get_all_extracted_data
+    else:
+        get_all_extracted_data = lambda: conn.execute(BASELINE_ALL_EXTRACTED_DATA_SQL).fetchall()
+    return {
+        "by image_id": timed(lambda i: database.get_extracted_data_by_image_id(image_id(i))),
+        "delete by image_id": timed(lambda i: delete_and_roll_back(image_id(i))),
+        "newest 100 by date": timed(lambda i: conn.execute(
+            f"SELECT id FROM extracted_data ORDER BY {date_column} DESC LIMIT 100").fetchall()),
+        "latest row for a username": timed(lambda i: conn.execute(
+            f"SELECT id FROM extracted_data WHERE username = ? ORDER BY {date_column} DESC LIMIT 1",
+            (f"user{i}",)).fetchall()),
+        "image listing": timed(lambda i: database.get_all_images(), repeats=3),
+        "get_all_extracted_data": timed(lambda i: get_all_extracted_data(), repeats=1),
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            database.close_db()
+            database.DB_NAME = os.path.join(tmp, f"bench_{size}.db")
+            database.init_db(target_version=1)
+            num_images = populate(size)
+            before = run_queries(num_images)
+
+            start = time.perf_counter()
+            database.init_db() # In-place upgrade to the latest schema
+            migrate_seconds = time.perf_counter() - start
+            after = run_queries(num_images)
+
+            print(f"\n{size:,} rows ({num_images:,} images), migration took {migrate_seconds:.2f}s")
+            print(f"{'query':<30} {'v1 (ms)':>12} {'v' + str(database.SCHEMA_VERSION) + ' (ms)':>12}")
+            for name in before:
+                print(f"{name:<30} {before[name]:>12.3f} {after[name]:>12.3f}")
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: peak Python memory while loading a stored screenshot for display.
+
+Usage: python benchmarks/bench_image_blob.py [image_path] [--no-decode]
+
+Stores the image in a throwaway database and compares the old path
+(get_image_blob + io.BytesIO) with the streaming open_image_blob reader.
+Peak memory is measured with tracemalloc. PIL's decoded pixel buffer is
+allocated outside the Python allocator, so the numbers show the extra copies
+of the encoded bytes. With --no-decode (or without an image) a random 8 MB
+blob is only read through, which needs no PIL.
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+CHUNK_SIZE = 64 * 1024
+
+
+def consume(stream, decode):
+    if decode:
+        from PIL import Image
+        image = Image.open(stream)
+        image.load()
+        return image.size
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def load_full_copy(image_id, decode):
+    return consume(io.BytesIO(database.get_image_blob(image_id)), decode)
+
+
+def load_streaming(image_id, decode):
+    with database.open_image_blob(image_id) as stream:
+        return consume(stream, decode)
+
+
+def measure(label, func, image_id, decode):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(image_id, decode)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} peak {peak / 1024 / 1024:8.2f} MB  {elapsed * 1000:8.1f} ms")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    decode = "--no-decode" not in sys.argv and bool(args)
+    if args:
+        with open(args[0], "rb") as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = os.urandom(8 * 1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.close_db()
+        database.DB_NAME = os.path.join(tmp, "bench_blob.db")
+        database.init_db()
+        image_id = database.add_image("/synthetic/screenshot.png", image_bytes)
+        print(f"Blob size: {len(image_bytes) / 1024 / 1024:.2f} MB, decode: {decode}")
+        measure("get_image_blob + BytesIO", load_full_copy, image_id, decode)
+        measure("open_image_blob (streaming)", load_streaming, image_id, decode)
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark: OCR throughput (images/sec) for different batch sizes.
+
+Usage: python benchmarks/bench_ocr_batch.py <screenshot folder> [batch sizes...]
+
+Runs ocr_processor.extract_data_batch over every screenshot in the folder
+once per batch size, with the OCR cache disabled. A batch size of 1 matches
+the old one readtext call per image. The models are loaded before timing.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_processor
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    folder = sys.argv[1]
+    batch_sizes = [int(size) for size in sys.argv[2:]] or [1, 2, 4, 8, 16]
+    image_paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+    if not image_paths:
+        print(f"No screenshots found in {folder}")
+        sys.exit(1)
+
+    ocr_processor.get_reader_pool().warm_up()
+    print(f"{len(image_paths)} images")
+
+    # Silence the per-batch timing lines while measuring
+    real_stdout = sys.stdout
+    results = []
+    for batch_size in batch_sizes:
+        sys.stdout = open(os.devnull, "w")
+        try:
+            start = time.perf_counter()
+            ocr_processor.extract_data_batch(image_paths, batch_size=batch_size, use_cache=False)
+            elapsed = time.perf_counter() - start
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+        results.append((batch_size, elapsed))
+        print(f"batch size {batch_size:>3}: {len(image_paths) / elapsed:8.2f} images/sec ({elapsed:.2f}s)")
+
+    baseline = results[0][1]
+    best_size, best_elapsed = min(results, key=lambda result: result[1])
+    print(f"best: batch size {best_size}, {baseline / best_elapsed:.2f}x batch size {results[0][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark: per-image OCR post-processing time (everything after readtext).
+
+Usage: python benchmarks/bench_postprocess.py [boxes_per_image]
+
+Feeds synthetic EasyOCR results (an allies list of cards: a username line,
+then a "Level N Class" line) through parse_ocr_results. If pandas is installed,
+the baseline parser (DataFrame filtering plus a token state machine) is timed
+on the same results for comparison.
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_processor
+
+REPEATS = 2000
+
+
+def synthetic_results(num_boxes, seed=0):
+    rng = random.Random(seed)
+    classes = [c.strip() for c in ocr_processor.CLASSES if "," not in c]
+    results = []
+    y = 0
+    while len(results) < num_boxes:
+        card_lines = [[f"Player{rng.randint(1, 9999)}"], ["Level", str(rng.randint(1, 300)), rng.choice(classes)]]
+        for words in card_lines:
+            x = rng.randint(0, 40)
+            for text in words:
+                dy = rng.randint(-3, 3) # Boxes on one line are rarely perfectly aligned
+                bbox = [[x, y + dy], [x + 120, y + dy], [x + 120, y + dy + 30], [x, y + dy + 30]]
+                results.append((bbox, text, rng.uniform(0.2, 1.0)))
+                x += 130
+            y += 40
+        y += 30 # Gap between cards
+    return results[:num_boxes]
+
+
+def baseline_parse(ocr_results):
+    """The baseline parser: pandas filtering, then a state machine over the joined tokens."""
+    import pandas as pd
+    results_list = []
+    for (bbox, text, prob) in ocr_results:
+        tl, tr, br, bl = bbox
+        results_list.append({'left': int(min(tl[0], bl[0])), 'top': int(min(tl[1], tr[1])),
+                             'text': text.strip(), 'conf': prob})
+    if not results_list:
+        return []
+    df = pd.DataFrame(results_list)
+    df = df[df['conf'] >= ocr_processor.MIN_CONFIDENCE]
+    df = df[df['text'].str.len() > 0]
+    if df.empty:
+        return []
+    df.sort_values(by=['top', 'left']).reset_index(drop=True) # Computed but unused, as in the baseline
+    tokens = [token for token in " ".join(df['text'].tolist()).split(' ') if token]
+
+    classes = ocr_processor.CLASSES
+    two_word_classes = {c.lower() for c in classes if len(c.split()) == 2}
+    three_word_classes = {c.lower() for c in classes if len(c.split()) == 3}
+    processed_tokens = []
+    i = 0
+    while i < len(tokens):
+        if i + 2 < len(tokens):
+            potential = f"{tokens[i]} {tokens[i+1]} {tokens[i+2]}".lower()
+            if potential in three_word_classes:
+                processed_tokens.append(next((c for c in classes if c.lower() == potential), potential))
+                i += 3
+                continue
+        if i + 1 < len(tokens):
+            potential = f"{tokens[i]} {tokens[i+1]}".lower()
+            if potential in two_word_classes:
+                processed_tokens.append(next((c for c in classes if c.lower() == potential), potential))
+                i += 2
+                continue
+        processed_tokens.append(tokens[i])
+        i += 1
+
+    state = "username"
+    data = {'username': '', 'level': 0, 'class': ''}
+    extracted_data = []
+    for index, token in enumerate(processed_tokens):
+        if state == "username":
+            if token.lower().startswith('level'):
+                next_is_digit = index < len(processed_tokens) - 1 and processed_tokens[index + 1].isdigit()
+                state = "level" if next_is_digit else "class"
+            else:
+                data['username'] += ' ' + token
+        elif state == "level":
+            if token.isdigit():
+                data['level'] = int(token)
+            state = "class"
+        else:
+            data['class'] += token
+            if data['username'] and data['class']:
+                extracted_data.append(data)
+            data = {'username': '', 'level': 0, 'class': ''}
+            state = "username"
+    return extracted_data
+
+
+def layout_stage(ocr_results):
+    return ocr_processor.card_layout.group_lines(ocr_processor.filter_ocr_boxes(ocr_results))
+
+
+def bench(label, func, ocr_results):
+    # Silence the per-row warnings while timing
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            func(ocr_results)
+        per_image = (time.perf_counter() - start) / REPEATS
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+    print(f"{label:<36} {per_image * 1e6:10.1f} us/image")
+
+
+def main():
+    num_boxes = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    ocr_results = synthetic_results(num_boxes)
+    print(f"{num_boxes} boxes per image, {REPEATS} repeats")
+    try:
+        import pandas # noqa: F401
+        bench("baseline parser (pandas)", baseline_parse, ocr_results)
+    except ImportError:
+        print("pandas not installed, skipping the baseline parser")
+    bench("box filter + line grouping stage", layout_stage, ocr_results)
+    bench("full parse_ocr_results", ocr_processor.parse_ocr_results, ocr_results)
+
+
+if __name__ == "__main__":
+    main()
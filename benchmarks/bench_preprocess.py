@@ -0,0 +1,122 @@
+"""Benchmark: OCR accuracy and latency for each preprocessing setting.
+
+Usage: python benchmarks/bench_preprocess.py [database] [--limit N] [settings...]
+
+Uses the screenshots stored in an application database (default
+orna_data.db, opened read-only) and their saved rows as ground truth, so
+only images whose data was checked and saved should be in it. For every
+setting (a preprocessing spec such as "gray,height=32,clahe") it reports
+the share of saved usernames and of full rows (username, level, class)
+that OCR reproduces, the preprocessing time and the total time per image.
+The OCR cache is bypassed.
+"""
+import io
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from PIL import Image
+import ocr_processor
+import preprocess
+
+DEFAULT_SETTINGS = [
+    "none",
+    "gray",
+    "gray,height=48",
+    "gray,height=32",
+    "gray,height=24",
+    "gray,height=32,stretch",
+    "gray,height=32,clahe",
+    "gray,height=32,otsu",
+    "gray,height=32,adaptive",
+    "gray,height=32,denoise",
+]
+
+
+def load_samples(db_path, limit):
+    """Returns [(screenshot array, expected rows)] for every image with saved rows."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        images = conn.execute('''
+            SELECT images.id, image_blobs.data FROM images
+            JOIN image_blobs ON image_blobs.id = images.blob_id
+            WHERE EXISTS (SELECT 1 FROM extracted_data WHERE extracted_data.image_id = images.id)
+            ORDER BY images.id LIMIT ?
+        ''', (limit,)).fetchall()
+        samples = []
+        for image_id, data in images:
+            rows = conn.execute("SELECT username, level, class FROM extracted_data WHERE image_id = ?",
+                                (image_id,)).fetchall()
+            screenshot = np.array(Image.open(io.BytesIO(data)).convert("RGB"))
+            samples.append((screenshot, [_row_key(*row) for row in rows]))
+        return samples
+    finally:
+        conn.close()
+
+
+def _row_key(username, level, class_name):
+    return (username.strip().lower(), int(level or 0), (class_name or '').strip().lower())
+
+
+def run_setting(spec, samples):
+    settings = preprocess.PreprocessSettings.from_spec(spec)
+
+    # Preprocessing alone, on the crops without any settings applied
+    ocr_processor.PREPROCESSING = preprocess.PreprocessSettings()
+    crops = [ocr_processor.load_cropped_image(screenshot) for screenshot, _ in samples]
+    start = time.perf_counter()
+    for crop in crops:
+        preprocess.preprocess(crop, settings)
+    preprocess_seconds = (time.perf_counter() - start) / len(samples)
+
+    ocr_processor.PREPROCESSING = settings
+    start = time.perf_counter()
+    all_rows = ocr_processor.extract_data_batch([screenshot for screenshot, _ in samples], batch_size=1, use_cache=False)
+    total_seconds = (time.perf_counter() - start) / len(samples)
+
+    expected_total = found_names = found_rows = 0
+    for (_, expected), rows in zip(samples, all_rows):
+        got = {_row_key(row['username'], row['level'], row['class']) for row in rows}
+        got_names = {key[0] for key in got}
+        expected_total += len(expected)
+        found_names += sum(1 for key in expected if key[0] in got_names)
+        found_rows += sum(1 for key in expected if key in got)
+    expected_total = max(1, expected_total)
+    return found_names / expected_total, found_rows / expected_total, preprocess_seconds, total_seconds
+
+
+def main():
+    args = sys.argv[1:]
+    limit = 50
+    if '--limit' in args:
+        index = args.index('--limit')
+        limit = int(args[index + 1])
+        del args[index:index + 2]
+    db_path = args.pop(0) if args and os.path.exists(args[0]) else "orna_data.db"
+    specs = args or DEFAULT_SETTINGS
+
+    samples = load_samples(db_path, limit)
+    if not samples:
+        print(f"No images with saved rows in {db_path}")
+        sys.exit(1)
+    ocr_processor.get_reader_pool().warm_up()
+    print(f"{len(samples)} images, {sum(len(expected) for _, expected in samples)} saved rows")
+    print(f"{'setting':<28} {'names':>7} {'rows':>7} {'preproc ms':>11} {'total ms':>9}")
+
+    real_stdout = sys.stdout
+    for spec in specs:
+        # Silence the per-image OCR output while measuring
+        sys.stdout = open(os.devnull, "w")
+        try:
+            names, rows, preprocess_seconds, total_seconds = run_setting(spec, samples)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+        print(f"{spec:<28} {names:7.1%} {rows:7.1%} {preprocess_seconds * 1000:11.1f} {total_seconds * 1000:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: application startup time to an interactive window.
+
+Usage: python benchmarks/bench_startup.py [runs]
+
+Starts main.py with -X importtime, lets it exit as soon as the window is
+interactive (ORNA_EXIT_AFTER_STARTUP=1, background preloading off) and
+reports the time-to-interactive printed by main.py, the wall time of the
+process, the slowest top-level imports and whether any of the heavy OCR or
+device modules were imported before the window appeared. Runs in a
+temporary directory, so a throwaway database is created there. Needs a display.
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("easyocr", "torch", "cv2", "numpy", "adbutils", "ocr_processor")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_once(workdir):
+    env = dict(os.environ, ORNA_EXIT_AFTER_STARTUP="1", ORNA_PRELOAD="0")
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", os.path.join(REPO_ROOT, "main.py")],
+                             cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    wall = time.perf_counter() - start
+    match = re.search(r"Window interactive after ([\d.]+)s", process.stdout)
+    if process.returncode != 0 or match is None:
+        print(process.stdout)
+        print(process.stderr[-2000:])
+        raise SystemExit("main.py did not start cleanly (is a display available?)")
+
+    imports = {} # Top-level module -> cumulative microseconds
+    imported = set()
+    for line in process.stderr.splitlines():
+        found = IMPORT_LINE.match(line)
+        if not found:
+            continue
+        cumulative, indent, name = int(found.group(2)), found.group(3), found.group(4)
+        imported.add(name.split('.')[0])
+        if len(indent) <= 1:
+            imports[name] = cumulative
+    return float(match.group(1)), wall, imports, imported
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_once(workdir) for _ in range(runs)]
+
+    interactive = sorted(result[0] for result in results)
+    walls = sorted(result[1] for result in results)
+    print(f"{runs} runs")
+    print(f"time to interactive: median {interactive[len(interactive) // 2]:.2f}s, best {interactive[0]:.2f}s")
+    print(f"process wall time:   median {walls[len(walls) // 2]:.2f}s, best {walls[0]:.2f}s")
+
+    _, _, imports, imported = results[-1]
+    print("slowest top-level imports (last run):")
+    for name, micros in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {name:<30} {micros / 1000:8.1f} ms")
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    print(f"heavy modules imported before the window: {', '.join(heavy) if heavy else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+# Default number of OCR worker processes. Every worker loads its own copy of the
+# EasyOCR models, so memory use grows with this number.
+DEFAULT_WORKERS = int(os.environ.get("ORNA_BULK_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+
+class BulkResult:
+    """Outcome of processing one image in a bulk run."""
+
+    def __init__(self, filepath, rows=None, error=None, timings=None):
+        self.filepath = filepath
+        self.rows = rows if rows is not None else []
+        self.error = error # None on success, otherwise an error message
+        self.timings = timings or {}
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _init_worker(num_threads):
+    """Runs once in every worker process: limits threads and loads a warm reader."""
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    import ocr_processor
+    ocr_processor.get_reader_pool().warm_up()
+
+
+def _process_batch(filepaths, batch_size):
+    """Worker entry point: OCRs a chunk of images in batches. Never raises.
+
+    If the batch fails, the images are retried one at a time so a single bad
+    file only fails itself.
+    """
+    import ocr_processor
+    try:
+        timings = []
+        all_rows = ocr_processor.extract_data_batch(filepaths, batch_size=batch_size, timings=timings)
+        return [BulkResult(filepath, rows=rows, timings=image_timings)
+                for filepath, rows, image_timings in zip(filepaths, all_rows, timings)]
+    except Exception:
+        return [_process_image(filepath) for filepath in filepaths]
+    finally:
+        # Worker processes exit without running atexit hooks, so write pending
+        # debug artifacts before handing the results back
+        artifacts = ocr_processor.debug_artifacts.get_artifact_writer()
+        if artifacts is not None:
+            artifacts.flush()
+
+
+def _process_image(filepath):
+    """Processes a single image. Never raises, so one bad image cannot take down the run."""
+    import ocr_processor
+    try:
+        timings = {}
+        rows = ocr_processor.extract_data_easyocr(filepath, timings=timings)
+        return BulkResult(filepath, rows=rows, timings=timings)
+    except Exception as e:
+        return BulkResult(filepath, error=f"{type(e).__name__}: {e}")
+
+
+class BulkOcrEngine:
+    """Runs OCR over many images on a pool of worker processes.
+
+    Images are handed to the workers in chunks of `batch_size`, which each
+    worker OCRs with ocr_processor.extract_data_batch. Results are yielded as
+    each chunk finishes (not in input order). Only a couple of chunks per worker
+    are in flight at a time, so cancel() takes effect quickly.
+
+    The worker pool is started on the first run and kept, with its warm
+    readers, for later runs. It is only rebuilt after a worker crashed or the
+    worker count changed; call shutdown() when done. Runs must not overlap.
+    """
+
+    def __init__(self, max_workers=None, batch_size=None):
+        import ocr_processor
+        self.max_workers = max(1, max_workers or DEFAULT_WORKERS)
+        self.batch_size = max(1, batch_size or ocr_processor.DEFAULT_BATCH_SIZE)
+        self._cancel_event = threading.Event()
+        self._executor = None
+
+    def _new_executor(self):
+        # Spawn rather than fork: forking a process that holds Tk and torch state is unsafe
+        threads_per_worker = max(1, (os.cpu_count() or 1) // self.max_workers)
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker,),
+        )
+
+    def _reset_executor(self, wait=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, chunk):
+        if self._executor is None:
+            self._executor = self._new_executor()
+        try:
+            return self._executor.submit(_process_batch, chunk, self.batch_size)
+        except BrokenProcessPool:
+            # A worker died while the pool was idle; start a fresh pool
+            self._reset_executor()
+            self._executor = self._new_executor()
+            return self._executor.submit(_process_batch, chunk, self.batch_size)
+
+    def set_max_workers(self, max_workers):
+        """Changes the worker count; the pool is restarted on the next run if it differs."""
+        max_workers = max(1, max_workers or DEFAULT_WORKERS)
+        if max_workers != self.max_workers:
+            self.max_workers = max_workers
+            self._reset_executor()
+
+    def shutdown(self, wait=False):
+        """Stops the worker processes (e.g. on application exit)."""
+        self._reset_executor(wait=wait)
+
+    def cancel(self):
+        """Stops submitting new images; images already running are allowed to finish."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self, filepaths, cancel_event=None):
+        """Processes `filepaths` and yields a BulkResult for each finished image.
+
+        The run stops submitting images once cancel() is called or
+        `cancel_event` (if given) is set.
+        """
+        self._cancel_event = cancel_event or threading.Event()
+        # Pop chunks from the end to keep input order
+        pending = [filepaths[i:i + self.batch_size] for i in range(0, len(filepaths), self.batch_size)][::-1]
+        max_in_flight = self.max_workers * 2
+        in_flight = {}
+        try:
+            while pending or in_flight:
+                # Keep the workers fed without queueing the whole folder up front
+                while pending and len(in_flight) < max_in_flight and not self.cancelled:
+                    chunk = pending.pop()
+                    in_flight[self._submit(chunk)] = chunk
+                if self.cancelled:
+                    pending.clear()
+                    for future in list(in_flight):
+                        if future.cancel():
+                            del in_flight[future]
+                if not in_flight:
+                    break
+
+                done, _ = concurrent.futures.wait(in_flight, timeout=0.5,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        yield from future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        for filepath in chunk:
+                            yield BulkResult(filepath, error=f"Worker process crashed: {e}")
+                    except Exception as e:
+                        for filepath in chunk:
+                            yield BulkResult(filepath, error=f"{type(e).__name__}: {e}")
+
+                if broken:
+                    # A worker died (e.g. out of memory). Everything still queued on the
+                    # broken pool is lost, so fail those images and start a fresh pool.
+                    for future, chunk in in_flight.items():
+                        for filepath in chunk:
+                            yield BulkResult(filepath, error="Worker process crashed")
+                    in_flight.clear()
+                    self._reset_executor()
+        finally:
+            # Stopped early (e.g. the consumer went away): drop chunks that have not
+            # started, but keep the pool for the next run
+            for future in in_flight:
+                future.cancel()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_bulk_engine(max_workers=None):
+    """Returns the process-wide engine, switched to `max_workers` workers."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = BulkOcrEngine(max_workers=max_workers)
+        else:
+            _engine.set_max_workers(max_workers)
+        return _engine
+
+
+def shutdown_bulk_engine():
+    """Stops the process-wide engine's workers, if it was ever started."""
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
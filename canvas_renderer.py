@@ -0,0 +1,148 @@
+import queue
+import traceback
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+import image_cache
+
+# Full-quality (LANCZOS) scaling waits until the canvas size has been stable this long
+RESIZE_SETTLE_MS = 150
+# How often finished background resamples are picked up while any are running
+RESAMPLE_POLL_MS = 30
+# Quick previews are scaled from a copy reduced to about this size (longer side)
+PREVIEW_BASE_SIZE = 800
+
+
+class CanvasImageRenderer:
+    """Draws images scaled to fit their canvases without blocking the Tk thread on resampling.
+
+    A new image or canvas size is drawn at once from a small reduced copy of
+    the image with a fast filter. The LANCZOS pass runs on a worker thread
+    once the size has settled; the result is picked up with `after()` polling
+    and swapped in (and kept in the image cache, so the next time that image
+    is shown at that size it is drawn in full quality straight away).
+    Everything except the resampling itself happens on the Tk thread.
+    """
+
+    def __init__(self, root, cache=None):
+        self.root = root
+        self.cache = cache or image_cache.get_image_cache()
+        self._images = {} # canvas -> (PIL image, image cache key) it should show
+        self._draw_pending = {} # canvas -> after_idle id of a coalesced redraw
+        self._settle_timers = {} # canvas -> after id of the scheduled full-quality pass
+        self._in_flight = set() # Canvases with a resample running on the worker
+        self._results = queue.Queue() # (canvas, key, size, future) of finished resamples
+        self._polling = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Resample")
+
+    def show(self, canvas, pil_image, image_key=None):
+        """Shows `pil_image` (identified by `image_key`) on `canvas`, or clears it if the image is None."""
+        self._images[canvas] = (pil_image, image_key)
+        self._cancel(self._draw_pending, canvas)
+        self._draw(canvas, settle_ms=0)
+
+    def resized(self, canvas):
+        """Redraws `canvas` for its new size; call it from the canvas's <Configure> handler."""
+        # A window drag fires many Configure events in a row; only draw for the last one
+        if canvas not in self._draw_pending:
+            self._draw_pending[canvas] = self.root.after_idle(self._draw_resized, canvas)
+
+    def close(self):
+        """Stops the worker thread, dropping resamples that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _draw_resized(self, canvas):
+        self._draw_pending.pop(canvas, None)
+        self._draw(canvas, settle_ms=RESIZE_SETTLE_MS)
+
+    def _cancel(self, timers, canvas):
+        after_id = timers.pop(canvas, None)
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+
+    def _target_size(self, canvas, pil_image):
+        """Size to draw `pil_image` at on `canvas`, or None while the canvas is not laid out yet."""
+        canvas_width = canvas.winfo_width()
+        canvas_height = canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return None
+        return image_cache.fit_size(pil_image.size, (canvas_width, canvas_height))
+
+    def _draw(self, canvas, settle_ms):
+        self._cancel(self._settle_timers, canvas)
+        pil_image, image_key = self._images.get(canvas, (None, None))
+        if pil_image is None:
+            canvas.delete("all")
+            canvas.tk_image = None # Clear stored image reference on canvas
+            return
+        size = self._target_size(canvas, pil_image)
+        if size is None:
+            return # Drawn once the canvas gets its real size
+
+        photo_image = self.cache.get_photo(image_key, size)
+        if photo_image is None and size == pil_image.size:
+            # Shown at its own size: no resampling needed
+            photo_image = ImageTk.PhotoImage(pil_image)
+            self.cache.put_photo(image_key, size, photo_image)
+        if photo_image is not None:
+            self._place(canvas, photo_image)
+            return
+
+        # Quick preview now, full quality once the size stops changing
+        preview_base = self.cache.get_preview_base(image_key, pil_image, PREVIEW_BASE_SIZE)
+        self._place(canvas, ImageTk.PhotoImage(preview_base.resize(size, Image.Resampling.BILINEAR)))
+        self._settle_timers[canvas] = self.root.after(settle_ms, self._resample, canvas)
+
+    def _place(self, canvas, photo_image):
+        # Store reference directly on the canvas widget to prevent garbage collection
+        canvas.tk_image = photo_image
+        canvas.delete("all")
+        canvas.create_image(canvas.winfo_width() / 2, canvas.winfo_height() / 2, anchor=tk.CENTER, image=photo_image)
+
+    def _resample(self, canvas):
+        """Starts the LANCZOS pass for what `canvas` should currently show."""
+        self._settle_timers.pop(canvas, None)
+        if canvas in self._in_flight:
+            return # Checked again when the running resample finishes
+        pil_image, image_key = self._images.get(canvas, (None, None))
+        if pil_image is None:
+            return
+        size = self._target_size(canvas, pil_image)
+        if size is None or self.cache.get_photo(image_key, size) is not None:
+            return
+        future = self._executor.submit(pil_image.resize, size, Image.Resampling.LANCZOS)
+        future.add_done_callback(lambda f: self._results.put((canvas, image_key, size, f)))
+        self._in_flight.add(canvas)
+        if not self._polling:
+            self._polling = True
+            self.root.after(RESAMPLE_POLL_MS, self._poll)
+
+    def _poll(self):
+        """Swaps finished resamples onto their canvases (Tk thread only)."""
+        while True:
+            try:
+                canvas, image_key, size, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight.discard(canvas)
+            try:
+                # PhotoImages must be created on the Tk thread
+                photo_image = ImageTk.PhotoImage(future.result())
+            except Exception as e:
+                print(f"Warning: Failed to resample image for display: {e}")
+                traceback.print_exc()
+                continue
+            self.cache.put_photo(image_key, size, photo_image)
+            pil_image, current_key = self._images.get(canvas, (None, None))
+            if pil_image is None or current_key != image_key or self._target_size(canvas, pil_image) != size:
+                # The canvas moved on meanwhile; resample for what it shows now
+                # (unless a settle timer will do so anyway)
+                if canvas not in self._settle_timers:
+                    self._resample(canvas)
+                continue
+            self._place(canvas, photo_image)
+
+        if self._in_flight:
+            self.root.after(RESAMPLE_POLL_MS, self._poll)
+        else:
+            self._polling = False
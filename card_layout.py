@@ -0,0 +1,143 @@
+import numpy as np
+
+# Two boxes are on the same text line if their vertical centres differ by at
+# most this fraction of the median box height.
+LINE_GAP_RATIO = 0.5
+# A new card starts where the distance between two line tops exceeds this
+# multiple of the median distance (the spacing of lines inside a card).
+CARD_GAP_RATIO = 1.5
+
+
+class TextLine:
+    """Words of one visual text line, left to right, with the line's vertical extent."""
+    __slots__ = ('top', 'bottom', 'words')
+
+    def __init__(self, top, bottom, words):
+        self.top = top
+        self.bottom = bottom
+        self.words = words
+
+
+def group_lines(boxes):
+    """Clusters OcrBoxes into text lines by their vertical centres.
+
+    Returns TextLines from top to bottom, each with its words left to right.
+    """
+    if not boxes:
+        return []
+    bounds = np.array([(box.left, box.top, box.bottom) for box in boxes], dtype=np.float64)
+    lefts, tops, bottoms = bounds[:, 0], bounds[:, 1], bounds[:, 2]
+    centers = (tops + bottoms) / 2
+    threshold = max(float(np.median(bottoms - tops)), 1.0) * LINE_GAP_RATIO
+
+    # Sort by centre; a gap larger than the threshold starts a new line
+    by_center = np.argsort(centers, kind='stable')
+    line_ids = np.empty(len(boxes), dtype=np.intp)
+    line_ids[by_center] = np.concatenate(([0], np.cumsum(np.diff(centers[by_center]) > threshold)))
+
+    # Order by line, then left to right, and cut at line boundaries
+    order = np.lexsort((lefts, line_ids))
+    cuts = np.flatnonzero(np.diff(line_ids[order])) + 1
+    lines = []
+    for members in np.split(order, cuts):
+        words = []
+        for i in members:
+            words.extend(boxes[i].text.split())
+        lines.append(TextLine(float(tops[members].min()), float(bottoms[members].max()), words))
+    return lines
+
+
+def split_cards(lines):
+    """Splits TextLines (top to bottom) into cards at the larger vertical gaps between them.
+
+    Cards have more than one line, so most line-to-line distances are the
+    spacing inside a card and their median is a good yardstick for it.
+    Returns a list of cards, each a list of TextLines.
+    """
+    if len(lines) < 3:
+        return [lines] if lines else []
+    tops = np.array([line.top for line in lines], dtype=np.float64)
+    steps = np.diff(tops)
+    threshold = max(float(np.median(steps)), 1.0) * CARD_GAP_RATIO
+    cuts = np.flatnonzero(steps > threshold) + 1
+    bounds = [0, *cuts.tolist(), len(lines)]
+    return [lines[start:stop] for start, stop in zip(bounds, bounds[1:])]
+
+
+def _level_position(words):
+    """Index of the word starting the "Level N" field, or -1."""
+    for i, word in enumerate(words):
+        if word.lower().startswith('level'):
+            return i
+    return -1
+
+
+def _parse_level(words):
+    """Parses ["Level", "212", ...], ["Level212", ...] or, with the label missed by OCR, ["212", ...].
+
+    Returns (level, remaining words).
+    """
+    if words and words[0].lower().startswith('level'):
+        inline = words[0][5:].strip(':')
+        if inline.isdigit():
+            return int(inline), words[1:]
+        words = words[1:]
+    if words and words[0].strip(':').isdigit():
+        return int(words[0].strip(':')), words[1:]
+    return 0, words
+
+
+def _parse_class(words, vocabulary):
+    """Resolves the class words of a card against the vocabulary, keeping raw text if unknown."""
+    if not words:
+        return ''
+    class_name, length, score = vocabulary.match_class(words, 0)
+    if class_name is None:
+        return ' '.join(words) # Unknown class, keep the raw words for manual review
+    if score < 1.0:
+        print(f"[Class] Corrected '{' '.join(words[:length])}' -> '{class_name}' (score {score:.2f})")
+    return class_name
+
+
+def parse_card(lines, vocabulary):
+    """Reads username, level and class from the TextLines of one card.
+
+    The username is on the first line and the level on the line below,
+    followed by the class on the same line or on the next one. A "Level"
+    label, where OCR found it, marks where the level starts (also when it
+    shares the username's line).
+    """
+    level_line = next((i for i, line in enumerate(lines) if _level_position(line.words) >= 0), None)
+    if level_line is None:
+        level_line, level_at = min(1, len(lines) - 1), 0 # No label: go by position
+    else:
+        level_at = _level_position(lines[level_line].words)
+    words = lines[level_line].words
+    if level_line == 0 and level_at == 0:
+        username_words, level_words = words, [] # A single line without a level
+    else:
+        username_words = [word for line in lines[:level_line] for word in line.words] + words[:level_at]
+        level_words = words[level_at:]
+
+    level, class_words = _parse_level(level_words)
+    if not class_words and level_line + 1 < len(lines):
+        class_words = lines[level_line + 1].words # Class is on its own line below the level
+    return {'username': ' '.join(username_words), 'level': level, 'class': _parse_class(class_words, vocabulary)}
+
+
+def parse_cards(lines, vocabulary):
+    """Splits text lines into ally cards and reads username, level and class from each.
+
+    Cards are found by the gaps between lines (see split_cards), not by their
+    text, so a missed "Level" token cannot merge two cards. Because each card
+    is parsed on its own, a misread in one card cannot shift the fields of the
+    next.
+    """
+    extracted_data = []
+    for card in split_cards(lines):
+        data = parse_card(card, vocabulary)
+        if data['username'] and data['class']:
+            extracted_data.append(data)
+        else:
+            print(f"[Warning] Could not extract complete data: U='{data['username']}', L={data['level']}, C='{data['class']}'")
+    return extracted_data
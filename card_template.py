@@ -0,0 +1,113 @@
+import threading
+import cv2
+import numpy as np
+
+# A pixel row counts as text if at least this fraction of its pixels is ink
+ROW_INK_RATIO = 0.02
+# Text bands thinner than this (px) are noise; bands taller than this many
+# median band heights are artwork (e.g. avatars), which the template cannot handle
+MIN_LINE_HEIGHT = 6
+MAX_LINE_HEIGHT_RATIO = 3.0
+# Extra pixels around each band handed to the recognizer
+LINE_PADDING = 3
+# Share of the ink rows of a new image that must fall inside the cached bands
+# for the cached template to be reused
+TEMPLATE_MATCH_RATIO = 0.9
+# Below this mean recognition confidence the caller falls back to full detection
+TEMPLATE_MIN_CONFIDENCE = 0.5
+
+
+def to_gray(crop):
+    """Grayscale version of an RGB(A) crop; grayscale crops are returned as is."""
+    if crop.ndim == 2:
+        return crop
+    return cv2.cvtColor(crop, cv2.COLOR_RGBA2GRAY if crop.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+def text_mask(gray):
+    """Boolean mask of text pixels. Otsu picks the threshold; text is assumed to be the minority colour."""
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = mask > 0
+    return ~mask if mask.mean() > 0.5 else mask
+
+def _ink_rows(mask):
+    return mask.mean(axis=1) > ROW_INK_RATIO
+
+def text_bands(mask):
+    """Returns (starts, ends) arrays of the horizontal bands of text rows, top to bottom."""
+    ink_rows = _ink_rows(mask).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ink_rows, [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    keep = (ends - starts) >= MIN_LINE_HEIGHT
+    return starts[keep], ends[keep]
+
+def find_text_lines(mask):
+    """Finds text lines with a horizontal projection profile.
+
+    Returns [x_min, x_max, y_min, y_max] boxes from top to bottom, or [] if the
+    profile does not look like a list of text lines.
+    """
+    starts, ends = text_bands(mask)
+    if len(starts) < 2:
+        return []
+    if (ends - starts).max() > MAX_LINE_HEIGHT_RATIO * np.median(ends - starts):
+        return []
+
+    lines = []
+    for y_min, y_max in zip(starts, ends):
+        columns = np.flatnonzero(mask[y_min:y_max].any(axis=0))
+        lines.append([int(columns[0]), int(columns[-1]) + 1, int(y_min), int(y_max)])
+    return lines
+
+def _template_fits(lines, ink_rows):
+    """True if the cached lines still cover this image's text rows."""
+    covered = np.zeros_like(ink_rows)
+    for _, _, y_min, y_max in lines:
+        if not ink_rows[y_min:y_max].any():
+            return False
+        covered[y_min:y_max] = True
+    return ink_rows[covered].sum() >= TEMPLATE_MATCH_RATIO * ink_rows.sum()
+
+
+_templates = {} # (width, height) of the crop -> text lines
+_templates_lock = threading.Lock()
+
+def get_template(mask):
+    """Returns the text lines for this crop, reusing the template cached for its size when it fits."""
+    size = (mask.shape[1], mask.shape[0])
+    with _templates_lock:
+        lines = _templates.get(size)
+    if lines is not None and _template_fits(lines, _ink_rows(mask)):
+        return lines
+    lines = find_text_lines(mask)
+    with _templates_lock:
+        _templates[size] = lines
+    return lines
+
+
+def recognize_cards(reader, crop, batch_size=1):
+    """Reads the allies list by recognising only the template's text lines.
+
+    Skips EasyOCR's CRAFT detector entirely. Returns readtext-style
+    (bbox, text, prob) results, or None when the template does not fit the
+    image or the recognition confidence is low, in which case the caller
+    should fall back to full detection.
+    """
+    gray = to_gray(crop)
+    lines = get_template(text_mask(gray))
+    if not lines:
+        return None
+
+    height, width = gray.shape[:2]
+    boxes = [[max(0, x_min - LINE_PADDING), min(width, x_max + LINE_PADDING),
+              max(0, y_min - LINE_PADDING), min(height, y_max + LINE_PADDING)]
+             for x_min, x_max, y_min, y_max in lines]
+    results = reader.recognize(gray, horizontal_list=boxes, free_list=[], detail=1, paragraph=False,
+                               batch_size=batch_size)
+    if not results:
+        return None
+
+    confidence = float(np.mean([prob for _, _, prob in results]))
+    if confidence < TEMPLATE_MIN_CONFIDENCE or not any('level' in text.lower() for _, text, _ in results):
+        print(f"[Template] Low confidence ({confidence:.2f}), falling back to full detection")
+        return None
+    return results
@@ -0,0 +1,162 @@
+import re
+import hashlib
+import functools
+
+# Fuzzy matching: maximum edit distance considered, and the minimum similarity
+# (1 - distance / length) needed before an OCR'd token is snapped to a class.
+MAX_EDIT_DISTANCE = 2
+MIN_MATCH_SCORE = 0.75
+# Corrections remembered per vocabulary (least recently used ones are dropped)
+CORRECTION_CACHE_SIZE = 4096
+
+
+def normalize_class_names(names):
+    """Cleans up a raw class list.
+
+    Splits comma-joined entries ("Omnimancer Antlia, Omnimagus Antlia"),
+    strips and collapses whitespace (" Deity Ursa") and drops duplicates
+    (case-insensitively), keeping the first spelling seen.
+    """
+    seen = set()
+    canonical = []
+    for entry in names:
+        for name in entry.split(','):
+            name = re.sub(r"\s+", " ", name).strip()
+            if name and name.lower() not in seen:
+                seen.add(name.lower())
+                canonical.append(name)
+    return canonical
+
+
+def _deletes(word, max_distance):
+    """All strings reachable from `word` by deleting up to `max_distance` characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - results
+        results |= frontier
+    return results
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance (Levenshtein plus transpositions), capped at max_distance + 1."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'name')
+
+    def __init__(self):
+        self.children = {} # lowercase token -> _TrieNode
+        self.name = None # Canonical class name if a class ends at this node
+
+
+class ClassVocabulary:
+    """Normalised class names with a token trie for longest-match lookups.
+
+    Built once; every exact lookup afterwards is a walk down the trie, and
+    fuzzy lookups go through a deletion index.
+    """
+
+    def __init__(self, names):
+        self.names = normalize_class_names(names)
+        self.by_lower = {name.lower(): name for name in self.names}
+        self.max_words = max((len(name.split()) for name in self.names), default=0)
+        # Changes whenever the class list is edited, so cached OCR results are invalidated
+        self.version = hashlib.sha256("\n".join(self.names).encode("utf-8")).hexdigest()[:16]
+
+        self._root = _TrieNode()
+        for name in self.names:
+            node = self._root
+            for word in name.lower().split():
+                node = node.children.setdefault(word, _TrieNode())
+            node.name = name
+
+        # SymSpell-style deletion index: every string reachable by deleting up to
+        # MAX_EDIT_DISTANCE characters from a class name maps back to that name
+        self._delete_index = {}
+        for key in self.by_lower:
+            for deleted in _deletes(key, MAX_EDIT_DISTANCE):
+                self._delete_index.setdefault(deleted, []).append(key)
+        self._cached_correction = functools.lru_cache(maxsize=CORRECTION_CACHE_SIZE)(self._correct)
+
+    def __contains__(self, text):
+        return text.lower() in self.by_lower
+
+    def __len__(self):
+        return len(self.names)
+
+    def canonical(self, text):
+        """Returns the canonical spelling of a class name (any casing), or None."""
+        return self.by_lower.get(text.lower())
+
+    def longest_match(self, tokens, start):
+        """Returns (class_name, token_count) for the longest class starting at tokens[start], or (None, 0)."""
+        node = self._root
+        best_name, best_length = None, 0
+        for offset in range(start, len(tokens)):
+            node = node.children.get(tokens[offset].lower())
+            if node is None:
+                break
+            if node.name is not None:
+                best_name, best_length = node.name, offset - start + 1
+        return best_name, best_length
+
+    def correct(self, text):
+        """Snaps a possibly misread class name to the closest canonical class.
+
+        Returns (class_name, score) where score is 1.0 for an exact match and
+        1 - distance / length for a fuzzy one, or (None, 0.0) if nothing is
+        within MAX_EDIT_DISTANCE edits and MIN_MATCH_SCORE similarity.
+        """
+        return self._cached_correction(re.sub(r"\s+", " ", text).strip().lower())
+
+    def _correct(self, key):
+        """correct() for an already normalised key, without the cache."""
+        best = (None, 0.0)
+        if key in self.by_lower:
+            best = (self.by_lower[key], 1.0)
+        elif key:
+            best_distance = MAX_EDIT_DISTANCE + 1
+            candidates = set()
+            for deleted in _deletes(key, MAX_EDIT_DISTANCE):
+                candidates.update(self._delete_index.get(deleted, ()))
+            for candidate in sorted(candidates): # Sorted so ties resolve the same way every run
+                distance = edit_distance(key, candidate, MAX_EDIT_DISTANCE)
+                if distance < best_distance:
+                    best_distance = distance
+                    score = 1.0 - distance / max(len(key), len(candidate))
+                    best = (self.by_lower[candidate], score) if score >= MIN_MATCH_SCORE else (None, 0.0)
+        return best
+
+    def match_class(self, tokens, start):
+        """Finds the class name starting at tokens[start], tolerating OCR errors.
+
+        Fuzzy matches of the next max_words tokens joined together are tried
+        from longest to shortest, and the longest one that matches wins. An
+        exact trie match only wins if no longer fuzzy match exists, so
+        "Grand Summoner Aurlga" becomes "Grand Summoner Auriga", not
+        "Grand Summoner". Returns (class_name, token_count, score), or
+        (None, 0, 0.0) if nothing matches.
+        """
+        exact_name, exact_length = self.longest_match(tokens, start)
+        for length in range(min(self.max_words, len(tokens) - start), exact_length, -1):
+            name, score = self.correct(" ".join(tokens[start:start + length]))
+            if name is not None:
+                return name, length, score
+        if exact_length:
+            return exact_name, exact_length, 1.0
+        return None, 0, 0.0
@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+import cv2
+import numpy as np
+import card_template
+
+# Calibrated crop boxes, one per screenshot resolution. Delete an entry (or the
+# file) to calibrate that resolution again.
+CROP_PROFILES_PATH = os.environ.get("ORNA_CROP_PROFILES", "crop_profiles.json")
+# Set ORNA_CROP_CALIBRATION=1 to calibrate; by default the fixed crop ratios are used
+CALIBRATION_ENABLED = os.environ.get("ORNA_CROP_CALIBRATION", "0") == "1"
+
+# The allies-list panel covers between these fractions of the screenshot
+MIN_PANEL_AREA = 0.15
+MAX_PANEL_AREA = 0.95
+# A contour counts as a rectangle if it fills this much of its bounding box
+MIN_RECTANGULARITY = 0.85
+# Trimmed inside the panel border, as a fraction of the height
+PANEL_MARGIN = 0.005
+# A detected box is only trusted if its width and height are within these
+# factors of the fixed-ratio box
+MIN_BOX_SCALE = 0.6
+MAX_BOX_SCALE = 1.5
+
+
+def _as_rgb_array(screenshot):
+    """Accepts a numpy array or a PIL image."""
+    if isinstance(screenshot, np.ndarray):
+        return screenshot
+    return np.asarray(screenshot.convert("RGB"))
+
+
+def detect_panel(gray, anchor):
+    """Finds the smallest large rectangle around `anchor` (x, y): the allies-list panel.
+
+    Returns (left, top, right, bottom) in pixels, or None.
+    """
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8)) # Close small gaps in the panel border
+    contours, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    image_area = gray.shape[0] * gray.shape[1]
+    best, best_area = None, None
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        if not MIN_PANEL_AREA * image_area <= area <= MAX_PANEL_AREA * image_area:
+            continue
+        if not (x <= anchor[0] < x + w and y <= anchor[1] < y + h):
+            continue
+        if cv2.contourArea(contour) < MIN_RECTANGULARITY * area:
+            continue
+        if best_area is None or area < best_area:
+            best, best_area = (x, y, x + w, y + h), area
+    return best
+
+
+def calibrate(screenshot, default_box):
+    """Detects the crop box for a screenshot, starting from the fixed-ratio `default_box`.
+
+    The panel gives the vertical extent (which is what changes between aspect
+    ratios). The columns stay those of the default box, clamped to the panel.
+    The box covers the whole panel rather than the text in this screenshot, so
+    it also fits screenshots of the resolution with more or fewer cards.
+    Returns None if no panel is found.
+    """
+    gray = card_template.to_gray(_as_rgb_array(screenshot))
+    height = gray.shape[0]
+    default_left, default_top, default_right, default_bottom = default_box
+    anchor = ((default_left + default_right) // 2, (default_top + default_bottom) // 2)
+    panel = detect_panel(gray, anchor)
+    if panel is None:
+        return None
+
+    margin = int(height * PANEL_MARGIN)
+    left = max(panel[0] + margin, default_left)
+    right = min(panel[2] - margin, default_right)
+    top, bottom = panel[1] + margin, panel[3] - margin
+    if right <= left or bottom <= top:
+        return None
+    return (int(left), int(top), int(right), int(bottom))
+
+
+def is_plausible(box, default_box):
+    """True if `box` is about the size of the fixed-ratio `default_box`."""
+    for size, default_size in ((box[2] - box[0], default_box[2] - default_box[0]),
+                               (box[3] - box[1], default_box[3] - default_box[1])):
+        if not MIN_BOX_SCALE * default_size <= size <= MAX_BOX_SCALE * default_size:
+            return False
+    return True
+
+
+class CropProfiles:
+    """Crop boxes per screenshot resolution, persisted as JSON.
+
+    Safe to share between threads. Worker processes each load the file and
+    merge their own entries into it when saving; the first entry stored for a
+    resolution wins.
+    """
+
+    def __init__(self, path=CROP_PROFILES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    @staticmethod
+    def _key(width, height):
+        return f"{width}x{height}"
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read crop profiles from {self.path}: {e}")
+            return {}
+
+    def get(self, width, height):
+        """Returns the stored profile dict for this resolution, or None."""
+        with self._lock:
+            if self._profiles is None:
+                self._profiles = self._read()
+            return self._profiles.get(self._key(width, height))
+
+    def put(self, width, height, profile):
+        """Stores `profile` unless another process already did for this resolution.
+
+        Returns the profile that is stored.
+        """
+        with self._lock:
+            profiles = self._read() # Pick up entries written by other processes
+            key = self._key(width, height)
+            if key in profiles:
+                self._profiles = profiles
+                return profiles[key]
+            profiles[key] = profile
+            self._profiles = profiles
+            try:
+                temp_path = f"{self.path}.tmp{os.getpid()}"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(profiles, f, indent=2, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Warning: Could not save crop profiles to {self.path}: {e}")
+            return profile
+
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+def get_crop_profiles():
+    """Returns the process-wide profile store."""
+    global _profiles
+    if _profiles is None:
+        with _profiles_lock:
+            if _profiles is None:
+                _profiles = CropProfiles()
+    return _profiles
+
+
+def get_crop_box(width, height, screenshot, default_box):
+    """Returns the crop box for a screenshot of this resolution.
+
+    The first screenshot of a resolution is calibrated and the result stored;
+    later ones reuse the stored box without any detection. If no panel is
+    found, or the detected box has an implausible size, `default_box` is
+    stored instead so the detection is not retried.
+    """
+    profiles = get_crop_profiles()
+    profile = profiles.get(width, height)
+    if profile is not None:
+        return tuple(profile['crop'])
+
+    box = calibrate(screenshot, default_box)
+    if box is None:
+        print(f"[Calibration] {width}x{height}: no panel found, using the default crop")
+        profile = {'crop': list(default_box), 'source': 'default'}
+    elif not is_plausible(box, default_box):
+        print(f"Warning: [Calibration] {width}x{height}: detected crop {box} is far from the default "
+              f"{tuple(default_box)}, using the default crop")
+        profile = {'crop': list(default_box), 'source': 'rejected', 'detected': list(box)}
+    else:
+        print(f"[Calibration] {width}x{height}: crop {box} (default {tuple(default_box)})")
+        profile = {'crop': list(box), 'source': 'detected'}
+    profile = profiles.put(width, height, profile)
+    return tuple(profile['crop'])
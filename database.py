@@ -1,13 +1,84 @@
+import io
 import sqlite3
+import hashlib
 import datetime
+import threading
+import contextlib
 
 DB_NAME = 'orna_data.db'
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
+# One connection is shared by the whole process (GUI thread and background OCR
+# jobs). Every use of it goes through _db_lock, so check_same_thread is off.
+_connection = None
+_db_lock = threading.RLock()
+
+# SQL used on hot paths. sqlite3 keeps compiled statements in a per-connection
+# cache keyed on the SQL text, so these are only prepared once.
+# extracted_ts (seconds since the epoch) of a TIMESTAMP column; unparseable dates sort first
+EXTRACTED_TS_SQL = "IFNULL(CAST(strftime('%s', {column}) AS INTEGER), 0)"
+# extracted_at defaults to CURRENT_TIMESTAMP; 'now' is the same instant within a statement
+INSERT_EXTRACTED_DATA_SQL = ("INSERT INTO extracted_data (image_id, username, level, class, friend, extracted_ts) "
+                             "VALUES (?, ?, ?, ?, ?, " + EXTRACTED_TS_SQL.format(column="'now'") + ")")
+DELETE_EXTRACTED_DATA_SQL = "DELETE FROM extracted_data WHERE image_id = ?"
+
+def _sha256_hex(data):
+    """Content address of an image blob."""
+    return hashlib.sha256(data).hexdigest()
+
+def get_connection():
+    """Returns the shared database connection, opening and configuring it on first use."""
+    global _connection
+    with _db_lock:
+        if _connection is None:
+            # isolation_level=None: no implicit transactions, we BEGIN/COMMIT explicitly
+            conn = sqlite3.connect(DB_NAME, timeout=30, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL") # Readers don't block the writer
+            conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL, no fsync per commit
+            conn.execute("PRAGMA cache_size=-16000") # ~16 MB page cache
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.create_function("sha256", 1, _sha256_hex, deterministic=True) # Used by migrations
+            _connection = conn
+        return _connection
+
+def close_db():
+    """Closes the shared connection (it is reopened on next use)."""
+    global _connection
+    with _db_lock:
+        if _connection is not None:
+            _connection.execute("PRAGMA optimize") # Refresh query planner statistics if needed
+            _connection.close()
+            _connection = None
+
+@contextlib.contextmanager
+def transaction():
+    """Runs the enclosed statements in one transaction and yields a cursor.
+
+    Commits on success and rolls back if an exception escapes. Nested uses
+    join the outermost transaction, so callers can group several of the
+    functions below (e.g. all rows of an image) into a single commit.
+    """
+    with _db_lock:
+        conn = get_connection()
+        if conn.in_transaction:
+            yield conn.cursor()
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def _fetch_all(sql, params=()):
+    """Runs a read query on the shared connection and returns (description, rows)."""
+    with _db_lock:
+        cursor = get_connection().execute(sql, params)
+        return cursor.description, cursor.fetchall()
+
+def _migration_1_initial_schema(cursor):
+    """Creates the original images and extracted_data tables."""
     # Create images table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS images (
@@ -31,158 +102,524 @@ def init_db():
             FOREIGN KEY (image_id) REFERENCES images (id)
         )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+def _migration_2_indexes(cursor):
+    """Adds indexes for the per-image lookups/deletes and the date and username orderings."""
+    # Per-image select/delete; the implicit rowid makes ORDER BY id free as well
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_data_image_id ON extracted_data (image_id)")
+    # All Data tab ordering (ORDER BY extracted_at DESC)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_data_extracted_at ON extracted_data (extracted_at)")
+    # Most recent entry per username
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_data_username ON extracted_data (username, extracted_at)")
+    # Covers the Manage tab listing (id is the rowid), so it never reads image rows
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_added_at ON images (added_at, file_path)")
+    cursor.execute("ANALYZE")
+
+def _migration_3_blob_store(cursor):
+    """Moves image bytes into a content-addressed image_blobs table."""
+    cursor.execute('''
+        CREATE TABLE image_blobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sha256 TEXT UNIQUE NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    ''')
+    # Identical screenshots stored under different paths collapse into one blob
+    cursor.execute('''
+        INSERT OR IGNORE INTO image_blobs (sha256, size, data)
+        SELECT sha256(image_data), length(image_data), image_data FROM images ORDER BY id
+    ''')
+    # Rebuild images without the BLOB column; it now only references the blob
+    cursor.execute('''
+        CREATE TABLE images_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT UNIQUE NOT NULL,
+            blob_id INTEGER NOT NULL REFERENCES image_blobs (id),
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO images_new (id, file_path, blob_id, added_at)
+        SELECT i.id, i.file_path, b.id, i.added_at
+        FROM images i
+        JOIN image_blobs b ON b.sha256 = sha256(i.image_data)
+    ''')
+    cursor.execute("DROP TABLE images")
+    cursor.execute("ALTER TABLE images_new RENAME TO images")
+    cursor.execute("CREATE INDEX idx_images_added_at ON images (added_at, file_path)")
+    cursor.execute("CREATE INDEX idx_images_blob_id ON images (blob_id)")
+    return True # The inline blobs left free pages behind, reclaim them
+
+def _migration_4_change_log(cursor):
+    """Adds a trigger-maintained change_log of inserted, updated and deleted image and extracted data rows."""
+    # version is AUTOINCREMENT, so it keeps growing even after old entries are pruned
+    cursor.execute('''
+        CREATE TABLE change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL
+        )
+    ''')
+    for table in ('images', 'extracted_data'):
+        for operation, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER {table}_{operation}_log AFTER {operation.upper()} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation) VALUES ('{table}', {row}.id, '{operation}');
+                END
+            ''')
+
+def _migration_5_sort_keys(cursor):
+    """Adds an integer extracted_ts and indexes for every All Data sort key."""
+    # Seconds since the epoch, so date sorting compares integers. The app's own
+    # inserts fill it in (INSERT_EXTRACTED_DATA_SQL); the triggers cover any
+    # other writer and edits of extracted_at.
+    cursor.execute("ALTER TABLE extracted_data ADD COLUMN extracted_ts INTEGER")
+    last_version = cursor.execute("SELECT IFNULL(MAX(version), 0) FROM change_log").fetchone()[0]
+    cursor.execute(f"UPDATE extracted_data SET extracted_ts = {EXTRACTED_TS_SQL.format(column='extracted_at')}")
+    # Only a derived column changed, so keep the backfill out of the change log
+    cursor.execute("DELETE FROM change_log WHERE version > ?", (last_version,))
+    cursor.execute(f'''
+        CREATE TRIGGER extracted_data_ts_insert AFTER INSERT ON extracted_data
+        WHEN NEW.extracted_ts IS NULL
+        BEGIN
+            UPDATE extracted_data SET extracted_ts = {EXTRACTED_TS_SQL.format(column='NEW.extracted_at')} WHERE id = NEW.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER extracted_data_ts_update AFTER UPDATE OF extracted_at ON extracted_data
+        BEGIN
+            UPDATE extracted_data SET extracted_ts = {EXTRACTED_TS_SQL.format(column='NEW.extracted_at')} WHERE id = NEW.id;
+        END
+    ''')
+    # One index per EXTRACTED_DATA_SORT_KEYS expression (plus id, the tie breaker),
+    # so a header click reads the first page straight from an index
+    cursor.execute("DROP INDEX IF EXISTS idx_extracted_data_extracted_at")
+    cursor.execute("CREATE INDEX idx_extracted_data_ts ON extracted_data (extracted_ts, id)")
+    cursor.execute("CREATE INDEX idx_extracted_data_username_nocase ON extracted_data (username COLLATE NOCASE, id)")
+    cursor.execute("CREATE INDEX idx_extracted_data_level ON extracted_data (IFNULL(level, -1), id)")
+    cursor.execute("CREATE INDEX idx_extracted_data_class_nocase ON extracted_data (IFNULL(class, '') COLLATE NOCASE, id)")
+    cursor.execute("CREATE INDEX idx_extracted_data_friend ON extracted_data (IFNULL(friend, 0), id)")
+    cursor.execute("ANALYZE")
+
+# Ordered list of (version, migration). Each migration runs exactly once per
+# database file and the version reached is stored in PRAGMA user_version.
+# A migration may return True to request a VACUUM once everything is committed.
+# Never edit a released migration; append a new one instead.
+SCHEMA_MIGRATIONS = [
+    (1, _migration_1_initial_schema),
+    (2, _migration_2_indexes),
+    (3, _migration_3_blob_store),
+    (4, _migration_4_change_log),
+    (5, _migration_5_sort_keys),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+def get_schema_version():
+    """Returns the schema version recorded in the database file."""
+    _, rows = _fetch_all("PRAGMA user_version")
+    return rows[0][0]
+
+def init_db(target_version=SCHEMA_VERSION):
+    """Initializes the database, creating tables and applying pending schema migrations.
+
+    Existing database files are upgraded in place. `target_version` is only
+    meant for benchmarks that need an older schema.
+    """
+    vacuum = False
+    with transaction() as cursor:
+        current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for version, migrate in SCHEMA_MIGRATIONS:
+            if current_version < version <= target_version:
+                print(f"Migrating database schema to version {version} ({migrate.__doc__.strip()})")
+                vacuum = migrate(cursor) or vacuum
+                cursor.execute(f"PRAGMA user_version = {version}")
+    if vacuum:
+        with _db_lock:
+            get_connection().execute("VACUUM")
+
+def get_change_version():
+    """Returns the version of the latest recorded change (0 if nothing was ever recorded)."""
+    _, rows = _fetch_all("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    return rows[0][0] if rows else 0
+
+def get_changes_since(version):
+    """Returns (latest_version, changes) for the changes recorded after `version`.
+
+    `changes` lists (table_name, row_id, operation) in the order they were
+    made; operation is 'insert', 'update' or 'delete'. Pass latest_version
+    to the next call to only get the changes made in between.
+    """
+    _, rows = _fetch_all("SELECT version, table_name, row_id, operation FROM change_log WHERE version > ? ORDER BY version",
+                         (version,))
+    if not rows:
+        return version, []
+    return rows[-1][0], [row[1:] for row in rows]
+
+def prune_change_log(version):
+    """Deletes the recorded changes up to and including `version` once they have been applied."""
+    try:
+        with transaction() as cursor:
+            cursor.execute("DELETE FROM change_log WHERE version <= ?", (version,))
+    except Exception as e:
+        print(f"Error pruning the change log: {e}")
+
+def get_image_id(file_path):
+    """Returns the ID of the image stored under `file_path`, or None."""
+    _, rows = _fetch_all("SELECT id FROM images WHERE file_path = ?", (file_path,))
+    return rows[0][0] if rows else None
 
 def add_image(file_path, image_data):
-    """Adds an image to the database. Returns the image ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    """Adds an image to the database. Returns the image ID.
+
+    The bytes go to the content-addressed blob store, so the same screenshot
+    saved under several paths is only stored once.
+    """
     try:
-        cursor.execute("INSERT INTO images (file_path, image_data) VALUES (?, ?)", (file_path, image_data))
-        image_id = cursor.lastrowid
-        conn.commit()
-    except sqlite3.IntegrityError:
-        # Image path already exists, find its ID
-        cursor.execute("SELECT id FROM images WHERE file_path = ?", (file_path,))
-        result = cursor.fetchone()
-        image_id = result[0] if result else None
+        with transaction() as cursor:
+            # Image path already exists, return its ID
+            cursor.execute("SELECT id FROM images WHERE file_path = ?", (file_path,))
+            result = cursor.fetchone()
+            if result:
+                return result[0]
+            sha256 = _sha256_hex(image_data)
+            cursor.execute("INSERT OR IGNORE INTO image_blobs (sha256, size, data) VALUES (?, ?, ?)",
+                           (sha256, len(image_data), image_data))
+            cursor.execute("SELECT id FROM image_blobs WHERE sha256 = ?", (sha256,))
+            blob_id = cursor.fetchone()[0]
+            cursor.execute("INSERT INTO images (file_path, blob_id) VALUES (?, ?)", (file_path, blob_id))
+            image_id = cursor.lastrowid
     except Exception as e:
         print(f"Error adding image: {e}")
-        conn.rollback()
         image_id = None
-    finally:
-        conn.close()
     return image_id
 
-def add_extracted_data(image_id, username, level, class_name, friend=False):
-    """Adds extracted data linked to an image ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+def _extracted_data_params(image_id, rows):
+    """Yields INSERT parameters for (username, level, class_name, friend) rows."""
+    for username, level, class_name, friend in rows:
+        yield (image_id, username, level, class_name, 1 if friend else 0)
+
+def replace_extracted_data(image_id, rows):
+    """Atomically replaces all extracted data of an image with `rows`.
+
+    `rows` is a list of (username, level, class_name, friend) tuples. The old
+    rows are deleted and the new ones inserted in a single transaction, so the
+    image is never left partially saved. Returns the number of rows saved, or
+    None if nothing was changed because of an error.
+    """
+    return replace_extracted_data_many([(image_id, rows)])
+
+def replace_extracted_data_many(items):
+    """Like replace_extracted_data, for a list of (image_id, rows) pairs, all in one transaction."""
     try:
-        # Convert boolean friend to integer (0 or 1) for DB
-        friend_int = 1 if friend else 0 
-        cursor.execute("INSERT INTO extracted_data (image_id, username, level, class, friend) VALUES (?, ?, ?, ?, ?)",
-                       (image_id, username, level, class_name, friend_int))
-        conn.commit()
+        saved_count = 0
+        with transaction() as cursor:
+            for image_id, rows in items:
+                cursor.execute(DELETE_EXTRACTED_DATA_SQL, (image_id,))
+                cursor.executemany(INSERT_EXTRACTED_DATA_SQL, _extracted_data_params(image_id, rows))
+                saved_count += len(rows)
+        return saved_count
     except Exception as e:
-        print(f"Error adding extracted data: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        print(f"Error replacing extracted data for {len(items)} image(s): {e}")
+        return None
 
 def clear_extracted_data_for_image(image_id):
     """Deletes all extracted data records associated with a specific image ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM extracted_data WHERE image_id = ?", (image_id,))
-        conn.commit()
+        with transaction() as cursor:
+            cursor.execute(DELETE_EXTRACTED_DATA_SQL, (image_id,))
         print(f"Cleared existing data for image ID {image_id}")
     except Exception as e:
         print(f"Error clearing data for image {image_id}: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
 
-def get_all_extracted_data():
-    """Retrieves all extracted data records along with image path."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+EXTRACTED_DATA_COLUMNS = "d.id, d.image_id, i.file_path, d.username, d.level, d.class, d.friend, d.extracted_at"
+
+# Sortable columns of query_extracted_data and their ORDER BY expressions.
+# Each has an index (see _migration_5_sort_keys), so keep them in sync.
+# Missing values sort as the lowest ones, so no key is NULL and a page can
+# continue from the last row of the previous one (see `after_id`). Every
+# order ends with id, so rows always come back in one well-defined order.
+EXTRACTED_DATA_SORT_KEYS = {
+    'username': "d.username COLLATE NOCASE",
+    'level': "IFNULL(d.level, -1)",
+    'class': "IFNULL(d.class, '') COLLATE NOCASE",
+    'friend': "IFNULL(d.friend, 0)",
+    'extracted_at': "d.extracted_ts",
+}
+
+# IDs of the newest record of every username. The recursive part hops from one
+# username to the next through idx_extracted_data_username (a skip scan), so
+# the cost grows with the number of usernames rather than of records.
+LATEST_EXTRACTED_DATA_IDS_SQL = """
+    WITH RECURSIVE usernames(username) AS (
+        SELECT MIN(username) FROM extracted_data
+        UNION ALL
+        SELECT (SELECT MIN(username) FROM extracted_data WHERE username > usernames.username)
+        FROM usernames WHERE usernames.username IS NOT NULL
+    )
+    SELECT (SELECT newest.id FROM extracted_data newest
+            WHERE newest.username = usernames.username
+            ORDER BY newest.extracted_at DESC, newest.id DESC LIMIT 1)
+    FROM usernames WHERE usernames.username IS NOT NULL
+"""
+
+def _extracted_data_filters(most_recent_only, friend):
+    """WHERE conditions (on extracted_data d) for the filters. Returns (conditions, params)."""
+    # The recency filter picks rows from the whole table, so it applies before
+    # the other filters. New filters go here.
+    conditions = []
+    params = []
+    if most_recent_only:
+        conditions.append(f"d.id IN ({LATEST_EXTRACTED_DATA_IDS_SQL})")
+    if friend is not None:
+        conditions.append("d.friend = ?")
+        params.append(1 if friend else 0)
+    return conditions, params
+
+def _extracted_data_order(order_by, descending):
+    direction = "DESC" if descending else "ASC"
+    return f"ORDER BY {EXTRACTED_DATA_SORT_KEYS[order_by]} {direction}, d.id {direction}"
+
+def _extracted_data_sql(conditions, order_by, descending):
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT {EXTRACTED_DATA_COLUMNS}
+        FROM extracted_data d
+        LEFT JOIN images i ON d.image_id = i.id
+        {where_sql}
+        {_extracted_data_order(order_by, descending)}
+    """
+
+def _extracted_data_ids(conditions, params, order_sql, limit, offset=0):
+    """IDs of one page of records, read from the sort key's index without touching skipped rows."""
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    _, rows = _fetch_all(f"SELECT d.id FROM extracted_data d {where_sql} {order_sql} LIMIT ? OFFSET ?",
+                         params + [limit, offset])
+    return [row[0] for row in rows]
+
+def _extracted_data_ids_after(conditions, params, order_by, descending, limit, after_id):
+    """Like _extracted_data_ids, for the records following record `after_id` (keyset paging).
+
+    Records sharing its sort key come first, then those past it. Two range
+    conditions instead of one OR, so both are index seeks even when many
+    records share a key (e.g. sorting by class).
+    """
+    key = EXTRACTED_DATA_SORT_KEYS[order_by]
+    _, anchor = _fetch_all(f"SELECT {key} FROM extracted_data d WHERE d.id = ?", (after_id,))
+    if not anchor:
+        return [] # Deleted since the caller read it
+    value = anchor[0][0]
+    comparison = "<" if descending else ">"
+    # The key is fixed here, so order by id alone; with the key in the ORDER BY
+    # SQLite would sort the whole run of equal keys instead of reading the index
+    ids = _extracted_data_ids(conditions + [f"{key} = ?", f"d.id {comparison} ?"], params + [value, after_id],
+                              f"ORDER BY d.id {'DESC' if descending else 'ASC'}", limit)
+    if len(ids) < limit:
+        ids += _extracted_data_ids(conditions + [f"{key} {comparison} ?"], params + [value],
+                                   _extracted_data_order(order_by, descending), limit - len(ids))
+    return ids
+
+def query_extracted_data(most_recent_only=False, friend=None, order_by='extracted_at', descending=True,
+                         limit=None, offset=0, after_id=None):
+    """Retrieves extracted data records (with image path), filtered and sorted in SQL.
+
+    most_recent_only: keep only the newest record of every username.
+    friend: None for all records, True for friends only, False for non-friends only.
+    The recency filter is applied before the friend filter. Rows are sorted by
+    `order_by` (a key of EXTRACTED_DATA_SORT_KEYS), newest first by default, and
+    returned as (id, image_id, file_path, username, level, class, friend, extracted_at).
+    With `limit` set only that many rows, starting at `offset`, are returned.
+    With `after_id` also set the rows start right after that record instead,
+    which costs the same anywhere in the result.
+    """
+    conditions, params = _extracted_data_filters(most_recent_only, friend)
     try:
-        # Join extracted_data with images to get file_path
-        cursor.execute("""
-            SELECT d.id, d.image_id, i.file_path, d.username, d.level, d.class, d.friend, d.extracted_at 
-            FROM extracted_data d
-            JOIN images i ON d.image_id = i.id
-            ORDER BY d.extracted_at DESC
-        """)
-        rows = cursor.fetchall()
+        if limit is None:
+            _, rows = _fetch_all(_extracted_data_sql(conditions, order_by, descending), params)
+            return rows
+        # Pick the page's ids first, then read and join just those rows
+        if after_id is None:
+            ids = _extracted_data_ids(conditions, params, _extracted_data_order(order_by, descending), limit, offset)
+        else:
+            ids = _extracted_data_ids_after(conditions, params, order_by, descending, limit, after_id)
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        _, rows = _fetch_all(_extracted_data_sql([f"d.id IN ({placeholders})"], order_by, descending), ids)
     except Exception as e:
-        print(f"Error fetching extracted data: {e}")
+        print(f"Error querying extracted data: {e}")
         rows = []
-    finally:
-        conn.close()
     return rows
 
+def count_extracted_data(most_recent_only=False, friend=None):
+    """Number of rows query_extracted_data returns for these filters."""
+    conditions, params = _extracted_data_filters(most_recent_only, friend)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    try:
+        _, rows = _fetch_all(f"SELECT COUNT(*) FROM extracted_data d {where_sql}", params)
+        return rows[0][0]
+    except Exception as e:
+        print(f"Error counting extracted data: {e}")
+        return 0
+
+def iter_extracted_data(most_recent_only=False, friend=None, order_by='extracted_at', descending=True,
+                        batch_size=1000):
+    """Yields the rows of query_extracted_data one at a time without loading them all.
+
+    The shared connection stays locked until the generator is exhausted or
+    closed, so consume it promptly (e.g. straight into a CSV writer).
+    """
+    conditions, params = _extracted_data_filters(most_recent_only, friend)
+    sql = _extracted_data_sql(conditions, order_by, descending)
+    with _db_lock:
+        cursor = get_connection().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+def get_all_extracted_data():
+    """Retrieves all extracted data records along with image path."""
+    return query_extracted_data()
+
 def get_extracted_data_by_image_id(image_id):
     """Retrieves all extracted data records for a specific image ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("""
+        description, rows = _fetch_all("""
             SELECT username, level, class, friend 
             FROM extracted_data 
             WHERE image_id = ? 
             ORDER BY id ASC 
         """, (image_id,))
         # Fetch as list of dictionaries for easier use in GUI
-        rows = [dict(zip([column[0] for column in cursor.description], row)) for row in cursor.fetchall()]
+        columns = [column[0] for column in description]
+        rows = [dict(zip(columns, row)) for row in rows]
     except Exception as e:
         print(f"Error fetching extracted data for image {image_id}: {e}")
         rows = []
-    finally:
-        conn.close()
     return rows
 
 def get_image_blob(image_id):
     """Retrieves the image blob data for a specific image ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT image_data FROM images WHERE id = ?", (image_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        _, rows = _fetch_all("""
+            SELECT b.data FROM images i
+            JOIN image_blobs b ON b.id = i.blob_id
+            WHERE i.id = ?
+        """, (image_id,))
+        return rows[0][0] if rows else None
     except Exception as e:
         print(f"Error fetching image blob for image {image_id}: {e}")
         return None
-    finally:
-        conn.close()
+
+class ImageBlobReader(io.RawIOBase):
+    """Read-only, seekable file object over an image blob (SQLite incremental BLOB I/O).
+
+    Bytes are read from the database on demand, so decoders such as PIL can
+    stream the image without the whole value being copied into memory first.
+    The reader has its own connection, so it never holds the shared one (or
+    its lock) while open. Closing the reader, or dropping it, closes both.
+    """
+
+    def __init__(self, conn, blob):
+        super().__init__()
+        self._conn = conn
+        self._blob = blob
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._blob.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._blob.seek(offset, whence)
+        return self._blob.tell()
+
+    def tell(self):
+        return self._blob.tell()
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._blob.close()
+                self._conn.close()
+            finally:
+                super().close()
+
+def open_image_blob(image_id):
+    """Opens a streaming reader over an image's bytes, or returns None if the image does not exist.
+
+    Use it as a context manager. On Python versions without Connection.blobopen
+    (< 3.11) the bytes are loaded into an io.BytesIO instead.
+    """
+    if not hasattr(sqlite3.Connection, "blobopen"):
+        blob_data = get_image_blob(image_id)
+        return io.BytesIO(blob_data) if blob_data is not None else None
+    get_connection() # Make sure the database is initialised and in WAL mode
+    conn = None
+    try:
+        # A private connection: with WAL it reads alongside the shared one
+        conn = sqlite3.connect(DB_NAME, timeout=30, isolation_level=None, check_same_thread=False)
+        result = conn.execute("SELECT blob_id FROM images WHERE id = ?", (image_id,)).fetchone()
+        if result is None:
+            conn.close()
+            return None
+        blob = conn.blobopen("image_blobs", "data", result[0], readonly=True)
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        print(f"Error opening image blob for image {image_id}: {e}")
+        return None
+    return ImageBlobReader(conn, blob)
+
+def get_images(image_ids):
+    """Retrieves (ID, file path) of the given images that still exist."""
+    if not image_ids:
+        return []
+    placeholders = ", ".join("?" * len(image_ids))
+    try:
+        _, rows = _fetch_all(f"SELECT id, file_path FROM images WHERE id IN ({placeholders})", list(image_ids))
+    except Exception as e:
+        print(f"Error fetching images {list(image_ids)}: {e}")
+        rows = []
+    return rows
 
 def get_all_images():
     """Retrieves a list of all images (ID and file path) from the database."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT id, file_path FROM images ORDER BY added_at DESC")
-        rows = cursor.fetchall()
+        _, rows = _fetch_all("SELECT id, file_path FROM images ORDER BY added_at DESC")
     except Exception as e:
         print(f"Error fetching all images: {e}")
         rows = []
-    finally:
-        conn.close()
     return rows
 
 def delete_image_and_data(image_id):
     """Deletes an image and all its associated extracted data."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        # Delete associated extracted data first (due to foreign key constraint)
-        cursor.execute("DELETE FROM extracted_data WHERE image_id = ?", (image_id,))
-        # Delete the image itself
-        cursor.execute("DELETE FROM images WHERE id = ?", (image_id,))
-        conn.commit()
+        with transaction() as cursor:
+            # Delete associated extracted data first (due to foreign key constraint)
+            cursor.execute(DELETE_EXTRACTED_DATA_SQL, (image_id,))
+            # Delete the image itself, and its blob unless another path shares it
+            cursor.execute("SELECT blob_id FROM images WHERE id = ?", (image_id,))
+            result = cursor.fetchone()
+            cursor.execute("DELETE FROM images WHERE id = ?", (image_id,))
+            if result:
+                cursor.execute("DELETE FROM image_blobs WHERE id = ? AND NOT EXISTS (SELECT 1 FROM images WHERE blob_id = ?)",
+                               (result[0], result[0]))
         print(f"Successfully deleted image ID {image_id} and its data.")
         return True
     except Exception as e:
         print(f"Error deleting image ID {image_id}: {e}")
-        conn.rollback()
         return False
-    finally:
-        conn.close()
-
-# Optional: Function to get image data by ID if needed later
-# def get_image_data(image_id):
-#     conn = sqlite3.connect(DB_NAME)
-#     cursor = conn.cursor()
-#     try:
-#         cursor.execute("SELECT image_data FROM images WHERE id = ?", (image_id,))
-#         result = cursor.fetchone()
-#         return result[0] if result else None
-#     except Exception as e:
-#         print(f"Error fetching image data: {e}")
-#         return None
-#     finally:
-#         conn.close() 
\ No newline at end of file
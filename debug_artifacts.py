@@ -0,0 +1,117 @@
+import os
+import json
+import queue
+import time
+import atexit
+import itertools
+import threading
+
+# Directory for debug artifacts; empty (the default) disables them. Set the
+# ORNA_DEBUG_ARTIFACTS environment variable or call enable() to switch them on.
+ARTIFACTS_DIR_ENV = "ORNA_DEBUG_ARTIFACTS"
+
+# Artifacts waiting to be written. When the writer falls this far behind, new
+# artifacts are dropped rather than slowing down OCR.
+MAX_PENDING = 32
+
+
+def _to_bgr(crop):
+    import cv2
+    if crop.ndim == 2:
+        return cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+    return cv2.cvtColor(crop, cv2.COLOR_RGBA2BGR if crop.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+
+
+class ArtifactWriter:
+    """Writes debug artifacts for each OCR'd image from a background thread.
+
+    For every submitted image it writes the crop handed to OCR
+    (<name>_<time>_crop.png), the crop with the recognised boxes drawn on it
+    (<name>_<time>_boxes.png) and the raw boxes plus parsed rows
+    (<name>_<time>_rows.json), where <time> is when it was submitted (plus a
+    sequence number), so processing an image again never overwrites earlier
+    artifacts.
+    submit() never blocks: all encoding and file I/O happens on the writer thread.
+    """
+
+    def __init__(self, directory, max_pending=MAX_PENDING):
+        self.directory = directory
+        self.dropped = 0
+        self._sequence = itertools.count(1) # Tells apart artifacts submitted within the same millisecond
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="ArtifactWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, crop, ocr_results, rows):
+        """Queues the artifacts of one image. The crop must not be modified afterwards."""
+        now = time.time()
+        name = (f"{name}_{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}"
+                f"-{next(self._sequence)}")
+        try:
+            self._queue.put_nowait((name, crop, ocr_results, rows))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1:
+                print("Warning: Debug artifact writer is falling behind, dropping artifacts")
+
+    def flush(self, timeout=None):
+        """Waits until everything submitted so far has been written."""
+        done = threading.Event()
+        try:
+            self._queue.put((None, done, None, None), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            name, crop, ocr_results, rows = self._queue.get()
+            if name is None:
+                crop.set() # Flush marker
+                continue
+            try:
+                self._write(name, crop, ocr_results, rows)
+            except Exception as e:
+                print(f"Warning: Could not write debug artifacts for {name}: {e}")
+
+    def _write(self, name, crop, ocr_results, rows):
+        # Imported here, on the writer thread, so enabling artifacts adds nothing to startup
+        import cv2
+        import numpy as np
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+        image = _to_bgr(crop)
+        cv2.imwrite(f"{base}_crop.png", image)
+
+        for bbox, _, _ in ocr_results:
+            points = np.array(bbox, dtype=np.int32).reshape(-1, 1, 2)
+            cv2.polylines(image, [points], isClosed=True, color=(0, 0, 255), thickness=2)
+        cv2.imwrite(f"{base}_boxes.png", image)
+
+        with open(f"{base}_rows.json", "w", encoding="utf-8") as f:
+            json.dump({
+                'boxes': [[[[float(x), float(y)] for x, y in bbox], str(text), float(prob)]
+                          for bbox, text, prob in ocr_results],
+                'rows': rows,
+            }, f, indent=2)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def enable(directory):
+    """Switches artifacts on for this process and for worker processes started after this call."""
+    os.environ[ARTIFACTS_DIR_ENV] = directory
+
+def get_artifact_writer():
+    """Returns the process-wide writer, or None if debug artifacts are disabled."""
+    global _writer
+    directory = os.environ.get(ARTIFACTS_DIR_ENV, "")
+    if not directory:
+        return None
+    if _writer is None or _writer.directory != directory:
+        with _writer_lock:
+            if _writer is None or _writer.directory != directory:
+                _writer = ArtifactWriter(directory)
+                atexit.register(_writer.flush, 10)
+    return _writer
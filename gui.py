@@ -1,18 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image
 import database
-import ocr_processor
+import bulk_engine
+import ocr_jobs
+import virtual_table
+import image_cache
+import canvas_renderer
+import queue
 import os
 import traceback # Import traceback for detailed error logging
 import datetime
-import io # To handle image blob data
 import tksheet # Import tksheet
 from tksheet import bool_formatter # Import the boolean formatter
-import adbutils # Added for ADB
-from adbutils import adb # For specific adb functions
 import csv # Import the csv module
 
+OCR_POLL_MS = 100 # How often the GUI drains background OCR job events
+
 class AppGUI:
     def __init__(self, master):
         self.master = master
@@ -28,27 +32,44 @@ class AppGUI:
         self.current_pil_image = None
         self.current_image_id = None # ID of image loaded in processing tab
         self.last_extracted_data = [] # Store raw OCR results before editing
-        self.tree_data_map = {} # Store treeview item ID -> (image_id, file_path)
         self.manage_tab_image_id = None # ID of image context in manage tab
         self.manage_tab_file_path = None
-        self.image_listbox_map = {} # Map listbox index to image_id/path
+        self.image_listbox_items = [] # Listbox index -> (image_id, file_path)
+        self.change_version = 0 # Last database change applied to the views (see apply_database_changes)
         self.bulk_folder_path = None # Path for bulk processing
         self.bulk_image_files = [] # List of image file paths in bulk folder
         self.bulk_results_map = {} # Map filepath -> extracted data list
         self.bulk_listbox_map = {} # Map listbox index -> filepath
         self.bulk_selected_filepath = None # Currently selected file in bulk list
+        self.ocr_job = None # Background OCR job currently running, if any
+        self.ocr_job_handler = None # Callback for events of the running job
 
-        # Sorting state for the main data treeview
-        self.tree_sort_column = 'Extraction Date' # Default sort column
-        self.tree_sort_direction = 'desc' # Default sort direction
-        self.tree_sort_reverse = True # Corresponding boolean flag
+        # Sorting state for the main data treeview (newest first by default)
+        self.tree_sort_column = 'extracted_at'
+        self.tree_sort_reverse = True
 
         # Filter state for the friend column in All Data tab
         self.friend_filter_var = tk.StringVar(value="Show All") # Default filter state
 
-        # Store current PIL images for resize handlers
+        # Store current PIL images (and their image cache keys) for resize handlers
+        self.current_image_key = None
         self.manage_tab_pil_image = None
+        self.manage_tab_image_key = None
         self.bulk_tab_pil_image = None
+        self.bulk_tab_image_key = None
+        # Draws those images scaled to their canvases, resampling off the Tk thread
+        self.image_renderer = canvas_renderer.CanvasImageRenderer(master)
+
+        # --- Background Job Bar (visible from every tab) ---
+        self.job_bar = ttk.Frame(master, padding=(10, 0, 10, 5))
+        self.job_bar.pack(side=tk.BOTTOM, fill="x")
+        self.job_bar.columnconfigure(1, weight=1)
+        self.job_status_label = ttk.Label(self.job_bar, text="No OCR job running.", width=45)
+        self.job_status_label.grid(row=0, column=0, sticky=tk.W)
+        self.job_progress = ttk.Progressbar(self.job_bar, orient=tk.HORIZONTAL, mode="determinate")
+        self.job_progress.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5)
+        self.job_cancel_button = ttk.Button(self.job_bar, text="Cancel", command=self.cancel_ocr_job, state=tk.DISABLED)
+        self.job_cancel_button.grid(row=0, column=2, sticky=tk.E)
 
         # --- Create Tabs --- 
         self.notebook = ttk.Notebook(master)
@@ -141,6 +162,12 @@ class AppGUI:
         self.bulk_select_folder_button.pack(side=tk.LEFT, padx=5)
         self.bulk_folder_label = ttk.Label(self.bulk_top_bar, text="No folder selected.")
         self.bulk_folder_label.pack(side=tk.LEFT, padx=5)
+        # Number of OCR worker processes used by "Process All"
+        self.bulk_workers_var = tk.IntVar(value=bulk_engine.DEFAULT_WORKERS)
+        self.bulk_workers_spinbox = ttk.Spinbox(self.bulk_top_bar, from_=1, to=os.cpu_count() or 1,
+                                                textvariable=self.bulk_workers_var, width=4, state="readonly")
+        self.bulk_workers_spinbox.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(self.bulk_top_bar, text="OCR Workers:").pack(side=tk.RIGHT)
         
         # --- Listbox Panel (in Tab 4) ---
         self.bulk_listbox_panel = ttk.Frame(self.bulk_tab, padding="5")
@@ -308,43 +335,36 @@ class AppGUI:
         )
         self.export_button.pack(side=tk.LEFT)
 
-        # Treeview setup (as before)
+        # Virtual treeview: only the rows in view exist as Treeview items, the
+        # rest are fetched from the database page by page while scrolling
         columns = ('username', 'level', 'class', 'friend', 'extracted_at')
-        self.data_tree = ttk.Treeview(self.all_data_panel, columns=columns, displaycolumns=columns, show='headings')
-        # ... (headings and column setup as before) ...
-        self.data_tree.heading('username', text='Username')
-        self.data_tree.heading('level', text='Level')
-        self.data_tree.heading('class', text='Class')
-        self.data_tree.heading('friend', text='Friend')
-        self.data_tree.heading('extracted_at', text='Extraction Date')
+        self.data_view = virtual_table.VirtualTreeview(
+            self.all_data_panel, columns,
+            format_row=self._format_tree_row,
+            row_key=lambda row: row[0], # extracted_data id
+            on_select=self.on_tree_select,
+        )
+        self.data_view.heading('username', text='Username')
+        self.data_view.heading('level', text='Level')
+        self.data_view.heading('class', text='Class')
+        self.data_view.heading('friend', text='Friend')
+        self.data_view.heading('extracted_at', text='Extraction Date')
         # Add sorting command to headers
         for col_id in columns:
-            self.data_tree.heading(col_id, 
+            self.data_view.heading(col_id, 
                                    command=lambda c=col_id: self.sort_treeview_column(c, False))
 
         # Configure column widths (adjust as needed)
-        self.data_tree.column('username', width=150)
-        self.data_tree.column('level', width=50, anchor=tk.CENTER)
-        self.data_tree.column('class', width=100)
-        self.data_tree.column('friend', width=60, anchor=tk.CENTER)
-        self.data_tree.column('extracted_at', width=150)
-        self.data_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-        # Scrollbar setup (as before)
-        scrollbar = ttk.Scrollbar(self.all_data_panel, orient=tk.VERTICAL, command=self.data_tree.yview)
-        self.data_tree.configure(yscroll=scrollbar.set)
-        scrollbar.grid(row=1, column=1, sticky='ns')
-
-        # Bind selection event (as before)
-        self.data_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
-
-        # Store data currently displayed in the Treeview for sorting/export
-        self.displayed_tree_data = []
-        # Initialize sorting state (though defaults are set earlier, good practice to ensure they exist before first use)
-        # self.tree_sort_column = None # Keep the default set earlier
-        # self.tree_sort_reverse = False # Keep the default set earlier
-
-        # Load initial data (after ALL tabs are created)
+        self.data_view.column('username', width=150)
+        self.data_view.column('level', width=50, anchor=tk.CENTER)
+        self.data_view.column('class', width=100)
+        self.data_view.column('friend', width=60, anchor=tk.CENTER)
+        self.data_view.column('extracted_at', width=150)
+        self.data_view.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # Load initial data (after ALL tabs are created); later saves and
+        # deletes only apply their changes (apply_database_changes)
+        self.change_version = database.get_change_version()
         self.load_data_into_treeview() # For All Data Tab
         self.populate_image_listbox() # For Manage Data Tab
 
@@ -360,6 +380,10 @@ class AppGUI:
 
         print(f"Getting or adding image for path: {file_path}")
         try:
+            # Already stored: no need to read and hash the file again
+            image_id = database.get_image_id(file_path)
+            if image_id is not None:
+                return image_id
             with open(file_path, 'rb') as f:
                 image_blob = f.read()
             image_id = database.add_image(file_path, image_blob)
@@ -374,37 +398,41 @@ class AppGUI:
              print(f"Error in _get_or_create_image_id for {file_path}: {e}")
              raise e 
 
-    def _display_image_on_canvas(self, canvas, pil_image):
-        """Helper to resize and display a PIL image on a canvas, storing the Tk image."""
-        if not pil_image:
-            canvas.delete("all")
-            canvas.tk_image = None # Clear stored image reference on canvas
-            return
-
-        canvas_width = canvas.winfo_width()
-        canvas_height = canvas.winfo_height()
-
-        if canvas_width <= 1 or canvas_height <= 1: # Avoid division by zero or tiny canvas
-            # If canvas size is not determined yet, don't try to draw
-            return 
-
-        # Resize image proportionally
-        img_copy = pil_image.copy()
-        # Use ANTIALIAS or LANCZOS for better quality
-        img_copy.thumbnail((canvas_width, canvas_height), Image.Resampling.LANCZOS) 
-
-        # Create and store PhotoImage
-        photo_image = ImageTk.PhotoImage(img_copy)
-        # Store reference directly on the canvas widget to prevent garbage collection
-        canvas.tk_image = photo_image 
-
-        # Display image on canvas, centered
-        canvas.delete("all")
-        canvas.create_image(canvas_width / 2, canvas_height / 2, anchor=tk.CENTER, image=photo_image)
+    def _load_image_from_db(self, image_id):
+        """Decodes an image straight from its database blob stream. Returns None if it is missing."""
+        blob_stream = database.open_image_blob(image_id)
+        if blob_stream is None:
+            return None
+        with blob_stream:
+            pil_image = Image.open(blob_stream)
+            pil_image.load() # Decode now, while the stream is still open
+        return pil_image
+
+    def _get_db_image(self, image_id):
+        """Returns the decoded image stored under `image_id` (cached), or None if it is missing."""
+        return image_cache.get_image_cache().get_image(image_cache.db_key(image_id),
+                                                       lambda: self._load_image_from_db(image_id))
+
+    def _get_file_image(self, file_path):
+        """Returns (decoded image, cache key) for an image file (cached until the file changes)."""
+        key = image_cache.file_key(file_path)
+        return image_cache.get_image_cache().get_image(key, lambda: Image.open(file_path)), key
+
+    def _display_image_on_canvas(self, canvas, pil_image, image_key=None):
+        """Helper to display a PIL image scaled to fit a canvas (or clear the canvas if it is None).
+
+        `image_key` identifies the image in the image cache, which keeps the
+        scaled copy for each canvas size. The canvas keeps showing it, rescaled,
+        when it is resized.
+        """
+        self.image_renderer.show(canvas, pil_image, image_key)
 
     def quit_app(self, event=None):
         """Closes the application window."""
         print("Escape pressed, exiting.")
+        if self.ocr_job is not None:
+            self.ocr_job.cancel() # Stop feeding OCR workers so shutdown is quick
+        self.image_renderer.close()
         self.master.destroy()
 
     def select_image(self):
@@ -426,13 +454,15 @@ class AppGUI:
         self.master.update_idletasks()
         
         try:
+            import adbutils # Imported on first capture, it is not needed to browse data
+
             # Ensure the target directory exists
             images_dir = "images"
             os.makedirs(images_dir, exist_ok=True)
             
             # Connect to the first device found
             print("Attempting to connect via ADB...")
-            device = adb.device()
+            device = adbutils.adb.device()
             serial = device.serial
             print(f"Connected to device: {serial}")
             self.status_label.config(text=f"Connected to {serial}. Capturing...")
@@ -457,6 +487,10 @@ class AppGUI:
             # Process the saved screenshot file
             self._process_loaded_image(save_path)
             
+        except ImportError:
+            messagebox.showerror("ADB Error", "The 'adbutils' package is not installed. Install the requirements to capture from a device.")
+            self.status_label.config(text="adbutils not installed.")
+            traceback.print_exc()
         except adbutils.errors.AdbError as e:
             messagebox.showerror("ADB Error", f"ADB command failed: {e}\
 Is ADB installed and in PATH? Is a device connected and authorized?")
@@ -480,7 +514,7 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
         self.save_button.config(state=tk.DISABLED)
 
         try:
-            self.current_pil_image = Image.open(file_path)
+            self.current_pil_image, self.current_image_key = self._get_file_image(file_path)
             # --- Removed DB insertion --- 
             # Add image to DB right away to get an ID
             # with open(file_path, 'rb') as f:
@@ -490,8 +524,8 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             #     raise ValueError("Failed to get image ID from database.")
             self.current_image_id = None # Image ID is unknown until saved
 
-            self.display_image(self.current_pil_image)
-            self.process_button.config(state=tk.NORMAL) # Enable process button
+            self.display_image(self.current_pil_image, self.current_image_key)
+            self._set_ocr_buttons_state(tk.NORMAL) # Enable process button (unless a job is running)
             self.status_label.config(text=f"Image loaded. Ready to process.")
 
         except FileNotFoundError:
@@ -503,41 +537,43 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             self.reset_image_panel()
 
     def trigger_ocr_processing(self):
-        """Called by Process button. Runs OCR and populates the data sheet."""
+        """Called by Process button. Runs OCR in the background and populates the data sheet."""
         if not self.current_image_path:
             messagebox.showwarning("Warning", "Please select an image first.")
             return
         
-        self.status_label.config(text="Processing OCR...")
-        self.master.update_idletasks()
-        self.process_button.config(state=tk.DISABLED) # Disable while processing
-
-        self.last_extracted_data = [] # Clear previous results
-        try:
-            print(f"Processing image ID: {self.current_image_id}, Path: {self.current_image_path}")
-            # Run OCR - UPDATED FUNCTION NAME
-            self.last_extracted_data = ocr_processor.extract_data_easyocr(self.current_image_path)
-            print(f"Extracted {len(self.last_extracted_data)} potential entries.")
-            
-            self.display_data_on_sheet(self.last_extracted_data)
-            
-            if self.last_extracted_data: # Enable save only if data was found
-                 self.save_button.config(state=tk.NORMAL)
-                 self.status_label.config(text="OCR complete. Edit sheet if needed and save.")
-            else:
-                 self.save_button.config(state=tk.DISABLED)
-                 self.status_label.config(text="OCR complete. No data found.")
-                 messagebox.showinfo("OCR Result", "No data automatically extracted.")
-
-        except ImportError as e:
-             messagebox.showerror("Error", f"Missing library: {e}...")
-             self.status_label.config(text=f"Import Error: {e}")
-        except Exception as e:
-            messagebox.showerror("Processing Error", f"Failed to process image: {e}")
-            traceback.print_exc()
-            self.status_label.config(text=f"Processing Error occurred.")
-        finally:
-             self.process_button.config(state=tk.NORMAL) # Re-enable after processing
+        image_path = self.current_image_path
+        print(f"Processing image ID: {self.current_image_id}, Path: {image_path}")
+
+        def handle_event(event):
+            if event.kind == ocr_jobs.RESULT:
+                if image_path != self.current_image_path:
+                    return # A different image was loaded while OCR was running
+                self.last_extracted_data = event.rows
+                print(f"Extracted {len(self.last_extracted_data)} potential entries.")
+                if event.timings.get('cache_hit'):
+                    timing_text = "(cached result)"
+                else:
+                    timing_text = f"(model load {event.timings['model_load']:.2f}s, OCR {event.timings['inference']:.2f}s)"
+                
+                self.display_data_on_sheet(self.last_extracted_data)
+                
+                if self.last_extracted_data: # Enable save only if data was found
+                     self.save_button.config(state=tk.NORMAL)
+                     self.status_label.config(text=f"OCR complete {timing_text}. Edit sheet if needed and save.")
+                else:
+                     self.save_button.config(state=tk.DISABLED)
+                     self.status_label.config(text=f"OCR complete {timing_text}. No data found.")
+                     messagebox.showinfo("OCR Result", "No data automatically extracted.")
+            elif event.kind == ocr_jobs.ERROR:
+                messagebox.showerror("Processing Error", f"Failed to process image: {event.error}")
+                self.status_label.config(text=f"Processing Error occurred.")
+            elif event.kind == ocr_jobs.FINISHED and event.cancelled:
+                self.status_label.config(text="OCR cancelled.")
+
+        if self._start_ocr_job([image_path], handle_event):
+            self.last_extracted_data = [] # Clear previous results
+            self.status_label.config(text="Processing OCR...")
 
     def display_data_on_sheet(self, data_list, sheet_widget=None):
         """Populates the specified data sheet with the extracted data."""
@@ -586,19 +622,13 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             # Update the current ID in case it was just created
             self.current_image_id = image_id 
             
-            database.clear_extracted_data_for_image(image_id)
-            saved_count = 0
-            # Use validated data directly (now 4 columns)
-            for username, level, class_name, friend_bool in valid_rows_to_save:
-                 try:
-                    database.add_extracted_data(image_id, username, level, class_name, friend_bool) # Pass friend_bool directly
-                    saved_count += 1
-                 except Exception as cell_e:
-                     print(f"Error saving row ({username}): {cell_e}")
+            # Replace the image's rows in one transaction (validated data, 4 columns)
+            saved_count = database.replace_extracted_data(image_id, valid_rows_to_save)
+            if saved_count is None:
+                raise RuntimeError("Database rejected the rows (see console). Nothing was changed.")
 
             messagebox.showinfo("Success", f"{saved_count} data entries saved.")
-            self.load_data_into_treeview() # Refresh all data tab
-            self.populate_image_listbox() # Refresh manage tab listbox
+            self.apply_database_changes() # Update all data tab and manage tab listbox
             # Keep save button enabled
         except Exception as e:
              messagebox.showerror("Database Error", f"Failed to save data: {e}")
@@ -623,19 +653,13 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             image_id = self._get_or_create_image_id(self.manage_tab_file_path)
             self.manage_tab_image_id = image_id # Ensure context ID is up-to-date
             
-            database.clear_extracted_data_for_image(image_id)
-            saved_count = 0
-            # Use validated data directly (now 4 columns)
-            for username, level, class_name, friend_bool in valid_rows_to_save:
-                 try:
-                    database.add_extracted_data(image_id, username, level, class_name, friend_bool) # Pass friend_bool directly
-                    saved_count += 1
-                 except Exception as cell_e:
-                     print(f"Error saving row ({username}): {cell_e}")
+            # Replace the image's rows in one transaction (validated data, 4 columns)
+            saved_count = database.replace_extracted_data(image_id, valid_rows_to_save)
+            if saved_count is None:
+                raise RuntimeError("Database rejected the rows (see console). Nothing was changed.")
 
             messagebox.showinfo("Success", f"{saved_count} data entries saved.")
-            self.load_data_into_treeview() # Refresh all data tab
-            # Optionally refresh listbox if needed, though content doesn't change on save
+            self.apply_database_changes() # Update all data tab
             # Keep save button enabled
         except Exception as e:
              messagebox.showerror("Database Error", f"Failed to save data: {e}")
@@ -686,157 +710,89 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             # Simpler way to clear
             target_sheet.set_sheet_data([]) 
 
-    def load_data_into_treeview(self):
-        """Loads data from DB, applies filter, and populates the treeview."""
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
-        self.tree_data_map.clear() 
-        self.displayed_tree_data = [] # Clear displayed data cache
-        
+    def _tree_query_args(self):
+        """Current All Data filters and sort order, as query_extracted_data arguments."""
+        return {
+            'most_recent_only': self.filter_duplicates_var.get(),
+            'friend': {"Friends Only": True, "Non-Friends Only": False}.get(self.friend_filter_var.get()),
+            'order_by': self.tree_sort_column,
+            'descending': self.tree_sort_reverse,
+        }
+
+    def _format_tree_row(self, row):
+        """Display values for one (id, image_id, file_path, username, level, class, friend, extracted_at) row."""
+        db_id, image_id, file_path, username, level, class_name, friend, timestamp_str = row
+        friend_display = "Yes" if friend else "No" # Format boolean for display
+        return (username, level, class_name, friend_display, self._format_timestamp(timestamp_str))
+
+    def _format_timestamp(self, timestamp_str):
+        """Formats a stored extracted_at value as YYYY-MM-DD HH:MM:SS."""
+        # SQLite's CURRENT_TIMESTAMP is already in that form; only parse anything else
+        if isinstance(timestamp_str, str) and len(timestamp_str) == 19 and timestamp_str[10] == ' ':
+            return timestamp_str
         try:
-            all_db_data = database.get_all_extracted_data()
-            
-            # --- Apply Filters ---
-            data_after_recency_filter = []
-            # 1. Apply "Show Only Most Recent per User" filter if checked
-            if self.filter_duplicates_var.get():
-                seen_usernames = set()
-                # Data is already sorted by extracted_at DESC from DB query
-                for row in all_db_data:
-                    username = row[3] # Username is at index 3
-                    if username not in seen_usernames:
-                        data_after_recency_filter.append(row)
-                        seen_usernames.add(username)
-            else:
-                data_after_recency_filter = all_db_data
-
-            # 2. Apply "Friend" filter
-            friend_filter_value = self.friend_filter_var.get()
-            data_to_display = []
-            if friend_filter_value == "Show All":
-                data_to_display = data_after_recency_filter
-            elif friend_filter_value == "Friends Only":
-                for row in data_after_recency_filter:
-                    # friend value is at index 6 (0 or 1)
-                    if row[6] == 1: 
-                        data_to_display.append(row)
-            elif friend_filter_value == "Non-Friends Only":
-                 for row in data_after_recency_filter:
-                     # friend value is at index 6 (0 or 1)
-                     if row[6] == 0: 
-                         data_to_display.append(row)
-            # --- End Apply Filters ---
-
-            # Store final filtered data for sorting/export
-            self.displayed_tree_data = data_to_display
-            
-            # Populate Treeview
-            for row in self.displayed_tree_data:
-                db_id, image_id, file_path, username, level, class_name, friend, timestamp_str = row
-                friend_display = "Yes" if friend else "No" # Format boolean for display
-                try:
-                    dt_obj = datetime.datetime.fromisoformat(timestamp_str)
-                    formatted_date = dt_obj.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    formatted_date = timestamp_str
-                item_id = self.data_tree.insert('', tk.END, values=(username, level, class_name, friend_display, formatted_date))
-                self.tree_data_map[item_id] = (image_id, file_path)
+            dt_obj = datetime.datetime.fromisoformat(timestamp_str)
+            return dt_obj.strftime("%Y-%m-%d %H:%M:%S")
+        except:
+            return timestamp_str
+
+    def load_data_into_treeview(self, keep_position=False):
+        """Points the All Data view at the rows matching the current filters and sort.
+
+        Filtering and sorting happen in SQL; the view only fetches the pages
+        it shows, so this costs the same however many rows the table holds.
+        """
+        try:
+            query_args = self._tree_query_args()
+            filters = {key: query_args[key] for key in ('most_recent_only', 'friend')}
 
-            # Apply existing sort if any
-            if self.tree_sort_column:
-                self.sort_treeview_column(self.tree_sort_column, self.tree_sort_reverse, refresh_display=False)
+            def fetch(offset, limit, reverse, after=None):
+                return database.query_extracted_data(
+                    most_recent_only=query_args['most_recent_only'], friend=query_args['friend'],
+                    order_by=query_args['order_by'], descending=query_args['descending'] != reverse,
+                    limit=limit, offset=offset, after_id=after[0] if after is not None else None)
 
+            source = virtual_table.PagedRowSource(fetch, lambda: database.count_extracted_data(**filters))
+            self.data_view.set_source(source, keep_position=keep_position)
         except Exception as e:
             print(f"Error loading data into treeview: {e}")
             traceback.print_exc()
 
-    def sort_treeview_column(self, col_id, reverse, refresh_display=True):
-        """Sorts the Treeview data by the specified column."""
-        if not self.displayed_tree_data:
-            return # Nothing to sort
-            
-        # Determine sort key and type based on column id
-        if col_id == 'username':
-            index = 3
-            key_func = lambda row: str(row[index]).lower() # Case-insensitive string sort
-        elif col_id == 'level':
-            index = 4
-            key_func = lambda row: int(row[index]) if row[index] is not None else -1 # Integer sort, handle None
-        elif col_id == 'class':
-            index = 5
-            key_func = lambda row: str(row[index]).lower()
-        elif col_id == 'friend': # Added sorting for friend
-             index = 6
-             key_func = lambda row: int(row[index]) # Sort by integer value (0 or 1)
-        elif col_id == 'extracted_at':
-            index = 7 # Index shifted due to friend column
-            # Convert to datetime for proper sorting, fallback to string if format fails
-            def date_key(row):
-                try: return datetime.datetime.fromisoformat(row[index])
-                except: return datetime.datetime.min # Put unparseable dates first
-            key_func = date_key
-        else:
+    def sort_treeview_column(self, col_id, reverse):
+        """Sorts the All Data view by the specified column (in SQL)."""
+        if col_id not in database.EXTRACTED_DATA_SORT_KEYS:
             return # Unknown column
-            
+
         # Toggle sort direction if the same column is clicked again
         if col_id == self.tree_sort_column:
             reverse = not self.tree_sort_reverse
         else:
             reverse = False # Default to ascending for new column
-            
-        self.displayed_tree_data.sort(key=key_func, reverse=reverse)
-        
-        # Update sort state
+
+        # Update sort state and re-query from the top
         self.tree_sort_column = col_id
         self.tree_sort_reverse = reverse
+        self.load_data_into_treeview()
 
-        # Refresh display if requested (default)
-        if refresh_display:
-            # Clear existing items
-            for item in self.data_tree.get_children():
-                self.data_tree.delete(item)
-            self.tree_data_map.clear()
-            
-            # Repopulate with sorted data
-            for row in self.displayed_tree_data:
-                db_id, image_id, file_path, username, level, class_name, friend, timestamp_str = row
-                friend_display = "Yes" if friend else "No" # Format boolean
-                try:
-                    dt_obj = datetime.datetime.fromisoformat(timestamp_str)
-                    formatted_date = dt_obj.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    formatted_date = timestamp_str
-                item_id = self.data_tree.insert('', tk.END, values=(username, level, class_name, friend_display, formatted_date))
-                self.tree_data_map[item_id] = (image_id, file_path)
-
-    def on_tree_select(self, event):
-        """Handles selection changes in the data Treeview."""
-        # (Implementation as before)
-        selected_items = self.data_tree.selection()
-        if not selected_items: return
-        selected_item_id = selected_items[0]
-        if selected_item_id in self.tree_data_map:
-            image_id, file_path = self.tree_data_map[selected_item_id]
-            self.display_image_from_db(image_id, file_path)
-            self.notebook.select(self.processing_tab)
-        else:
-             print(f"Warning: Selected tree item {selected_item_id} not found in data map.")
+    def on_tree_select(self, row):
+        """Handles selection of a row in the All Data view."""
+        image_id, file_path = row[1], row[2]
+        self.display_image_from_db(image_id, file_path)
+        self.notebook.select(self.processing_tab)
 
     def display_image_from_db(self, image_id, file_path):
          """Loads image blob, displays it (Proc Tab), and populates PROC TAB sheet."""
          try:
-            image_blob = database.get_image_blob(image_id)
-            if image_blob:
-                pil_image = Image.open(io.BytesIO(image_blob))
-                self.display_image(pil_image) # Displays on proc tab canvas
+            pil_image = self._get_db_image(image_id)
+            if pil_image:
+                self.display_image(pil_image, image_cache.db_key(image_id)) # Displays on proc tab canvas
                 self.current_image_id = image_id
                 self.current_image_path = file_path
-                self.current_pil_image = pil_image
                 # Fetch SAVED data for this image to populate PROC TAB sheet
                 saved_data = database.get_extracted_data_by_image_id(image_id)
                 self.last_extracted_data = saved_data 
                 self.display_data_on_sheet(saved_data, sheet_widget=self.data_sheet) # Use proc tab sheet
-                self.process_button.config(state=tk.NORMAL)
+                self._set_ocr_buttons_state(tk.NORMAL)
                 self.save_button.config(state=tk.NORMAL if saved_data else tk.DISABLED)
                 self.status_label.config(text=f"Loaded image ID {image_id} from All Data tab. Process again or edit/save.")
             else:
@@ -847,38 +803,85 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
              traceback.print_exc()
              self.reset_image_panel()
              
-    def display_image(self, pil_image):
-        """Displays the given PIL image on the PROC TAB canvas."""
+    def display_image(self, pil_image, image_key):
+        """Displays the given PIL image (identified by its image cache key) on the PROC TAB canvas."""
         # Store the current PIL image for the processing tab
         self.current_pil_image = pil_image 
+        self.current_image_key = image_key
         # Use the helper to display
-        self._display_image_on_canvas(self.image_canvas, self.current_pil_image)
+        self._display_image_on_canvas(self.image_canvas, self.current_pil_image, self.current_image_key)
         
     def reset_image_panel(self):
          """Clears the image canvas, PROC TAB sheet and related variables."""
-         self.image_canvas.delete("all")
+         self._display_image_on_canvas(self.image_canvas, None)
          self.clear_sheet(sheet_widget=self.data_sheet) # Use proc tab sheet
          self.current_image_path = None
          self.current_pil_image = None # Clear stored PIL image
+         self.current_image_key = None
          self.current_image_id = None
          self.last_extracted_data = []
          self.process_button.config(state=tk.DISABLED)
          self.save_button.config(state=tk.DISABLED)
          self.status_label.config(text="Failed to load image or no image selected.")
 
+    def _image_display_name(self, img_id, file_path):
+        return os.path.basename(file_path) if file_path else f"Image ID: {img_id}"
+
     def populate_image_listbox(self):
         """Clears and repopulates the image listbox in the Manage tab."""
         self.image_listbox.delete(0, tk.END) # Clear listbox
-        self.image_listbox_map.clear()
+        self.image_listbox_items = []
         try:
             all_images = database.get_all_images()
-            for index, (img_id, file_path) in enumerate(all_images):
-                display_name = os.path.basename(file_path) if file_path else f"Image ID: {img_id}"
-                self.image_listbox.insert(tk.END, display_name)
-                self.image_listbox_map[index] = (img_id, file_path)
+            for img_id, file_path in all_images:
+                self.image_listbox.insert(tk.END, self._image_display_name(img_id, file_path))
+                self.image_listbox_items.append((img_id, file_path))
         except Exception as e:
              print(f"Error populating image listbox: {e}")
              traceback.print_exc()
+
+    def _apply_image_listbox_changes(self, image_ids):
+        """Updates the listbox entries of the given (inserted, updated or deleted) images."""
+        current = {img_id: file_path for img_id, file_path in database.get_images(image_ids)}
+        # Remove deleted images and refresh renamed ones in place
+        for index in range(len(self.image_listbox_items) - 1, -1, -1):
+            img_id, file_path = self.image_listbox_items[index]
+            if img_id not in image_ids:
+                continue
+            if img_id not in current:
+                self.image_listbox.delete(index)
+                del self.image_listbox_items[index]
+            elif current[img_id] != file_path:
+                self.image_listbox.delete(index)
+                self.image_listbox.insert(index, self._image_display_name(img_id, current[img_id]))
+                self.image_listbox_items[index] = (img_id, current[img_id])
+        # New images are the most recently added, and the list is newest first
+        listed = {img_id for img_id, _ in self.image_listbox_items}
+        for img_id in sorted(current):
+            if img_id not in listed:
+                self.image_listbox.insert(0, self._image_display_name(img_id, current[img_id]))
+                self.image_listbox_items.insert(0, (img_id, current[img_id]))
+
+    def apply_database_changes(self):
+        """Brings the All Data view and the Manage tab listbox up to date after a save or delete.
+
+        Only the changes recorded since the last call are read (database change
+        log): touched listbox entries are updated in place and the All Data view
+        re-reads just the rows in view, however much history is stored.
+        """
+        try:
+            self.change_version, changes = database.get_changes_since(self.change_version)
+            if not changes:
+                return
+            image_ids = {row_id for table_name, row_id, _ in changes if table_name == 'images'}
+            if image_ids:
+                self._apply_image_listbox_changes(image_ids)
+            if any(table_name == 'extracted_data' for table_name, _, _ in changes):
+                self.data_view.refresh() # Keeps the scroll position and selection
+            database.prune_change_log(self.change_version)
+        except Exception as e:
+            print(f"Error applying database changes: {e}")
+            traceback.print_exc()
              
     def on_listbox_select(self, event):
         """Handles selection changes in the image listbox."""
@@ -886,8 +889,8 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
         if not selected_indices: return
         
         selected_index = selected_indices[0]
-        if selected_index in self.image_listbox_map:
-            image_id, file_path = self.image_listbox_map[selected_index]
+        if selected_index < len(self.image_listbox_items):
+            image_id, file_path = self.image_listbox_items[selected_index]
             self.manage_tab_image_id = image_id # Set context for manage tab
             self.manage_tab_file_path = file_path
             self.display_manage_tab_image(image_id)
@@ -896,18 +899,18 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             # Always enable save button once an image is selected in this tab
             self.manage_save_button.config(state=tk.NORMAL) 
         else:
-             print(f"Error: Selected listbox index {selected_index} not in map.")
+             print(f"Error: Selected listbox index {selected_index} not in the image list.")
              self.reset_manage_panel()
              
     def display_manage_tab_image(self, image_id):
          """Loads image blob and its SAVED data into the Manage Tab."""
          try:
-            image_blob = database.get_image_blob(image_id)
-            if image_blob:
-                pil_image = Image.open(io.BytesIO(image_blob))
+            pil_image = self._get_db_image(image_id)
+            if pil_image:
                 # Display on manage tab canvas
                 self.manage_tab_pil_image = pil_image
-                self._display_image_on_canvas(self.manage_image_canvas, self.manage_tab_pil_image)
+                self.manage_tab_image_key = image_cache.db_key(image_id)
+                self._display_image_on_canvas(self.manage_image_canvas, self.manage_tab_pil_image, self.manage_tab_image_key)
                 
                 # Load saved data into manage tab sheet
                 saved_data = database.get_extracted_data_by_image_id(image_id)
@@ -934,17 +937,18 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to permanently delete\n'{display_name}'\nand all its associated data?"):
             success = database.delete_image_and_data(image_id_to_delete)
             if success:
+                image_cache.get_image_cache().discard(image_cache.db_key(image_id_to_delete))
                 messagebox.showinfo("Deleted", f"'{display_name}' deleted successfully.")
                 self.reset_manage_panel() # Clear the panel
-                self.populate_image_listbox() # Refresh listbox
-                self.load_data_into_treeview() # Refresh treeview
+                self.apply_database_changes() # Drop it from the listbox and treeview
             else:
                  messagebox.showerror("Error", f"Failed to delete image ID {image_id_to_delete}.")
 
     def reset_manage_panel(self):
         """Clears the controls on the manage tab."""
         self.manage_tab_pil_image = None # Clear stored PIL image
-        self.manage_image_canvas.delete("all")
+        self.manage_tab_image_key = None
+        self._display_image_on_canvas(self.manage_image_canvas, None)
         self.clear_sheet(sheet_widget=self.manage_data_sheet)
         self.manage_tab_image_id = None
         self.manage_tab_file_path = None
@@ -967,7 +971,9 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
         self.bulk_image_files.clear()
         self.bulk_results_map.clear()
         self.clear_sheet(sheet_widget=self.bulk_data_sheet)
-        self.bulk_image_canvas.delete("all")
+        self.bulk_tab_pil_image = None
+        self.bulk_tab_image_key = None
+        self._display_image_on_canvas(self.bulk_image_canvas, None)
         self.bulk_process_selected_button.config(state=tk.DISABLED)
         self.bulk_process_all_button.config(state=tk.DISABLED)
         self.bulk_save_selected_button.config(state=tk.DISABLED)
@@ -985,10 +991,8 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
                         self.bulk_listbox_map[index] = full_path
                         index += 1
             
-            if self.bulk_image_files:
-                 self.bulk_process_all_button.config(state=tk.NORMAL)
-            else:
-                 self.bulk_process_all_button.config(state=tk.DISABLED)
+            self._set_ocr_buttons_state(tk.NORMAL) # Enables Process All if images were found
+            if not self.bulk_image_files:
                  messagebox.showinfo("Info", "No images found in the selected folder.")
                  
         except Exception as e:
@@ -1017,11 +1021,12 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             else:
                 self.clear_sheet(sheet_widget=self.bulk_data_sheet)
                 self.bulk_save_selected_button.config(state=tk.DISABLED)
-            self.bulk_process_selected_button.config(state=tk.NORMAL)
+            self._set_ocr_buttons_state(tk.NORMAL) # Unless an OCR job is running
         else:
              print(f"Error: Selected bulk listbox index {selected_index} not in map.")
              self.bulk_selected_filepath = None
              self.bulk_tab_pil_image = None # Clear PIL image if selection invalid
+             self.bulk_tab_image_key = None
              self._display_image_on_canvas(self.bulk_image_canvas, None)
              self.clear_sheet(sheet_widget=self.bulk_data_sheet)
              self.bulk_save_selected_button.config(state=tk.DISABLED)
@@ -1030,261 +1035,262 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
     def display_bulk_tab_image(self, filepath):
         """Displays the image from the filepath in the bulk tab canvas."""
         try:
-            # Load and store the PIL image for the bulk tab
-            self.bulk_tab_pil_image = Image.open(filepath)
+            # Load (or reuse the cached decode of) the PIL image for the bulk tab
+            self.bulk_tab_pil_image, self.bulk_tab_image_key = self._get_file_image(filepath)
             # Call the helper to display it
-            self._display_image_on_canvas(self.bulk_image_canvas, self.bulk_tab_pil_image)
+            self._display_image_on_canvas(self.bulk_image_canvas, self.bulk_tab_pil_image, self.bulk_tab_image_key)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to display image: {os.path.basename(filepath)}\n{e}")
-            self.bulk_image_canvas.delete("all")
+            self._display_image_on_canvas(self.bulk_image_canvas, None)
             self.bulk_tab_pil_image = None # Clear on error
+            self.bulk_tab_image_key = None
             traceback.print_exc() 
              
     def process_selected_bulk(self):
-        """Processes the single image currently selected in the bulk list."""
+        """Processes the single image currently selected in the bulk list in the background."""
         if not self.bulk_selected_filepath:
              messagebox.showwarning("Warning", "No image selected in the list.")
              return
         
         filepath = self.bulk_selected_filepath
+        folder_path = self.bulk_folder_path
         print(f"Processing selected bulk image: {filepath}")
-        self.status_label.config(text=f"Processing {os.path.basename(filepath)}...")
-        self.master.update_idletasks()
-        # Disable buttons during processing
-        self.bulk_process_selected_button.config(state=tk.DISABLED)
-        self.bulk_process_all_button.config(state=tk.DISABLED)
-        
-        try:
-            extracted_data = ocr_processor.extract_data_easyocr(filepath)
-            self.bulk_results_map[filepath] = extracted_data # Store/update results
-            self.display_data_on_sheet(extracted_data, sheet_widget=self.bulk_data_sheet)
-            self.status_label.config(text=f"Processed {os.path.basename(filepath)}. Edit sheet and save if needed.")
-            # Enable relevant save buttons
-            self.bulk_save_selected_button.config(state=tk.NORMAL)
-            self.bulk_save_all_button.config(state=tk.NORMAL if self.bulk_results_map else tk.DISABLED)
-            print(f" -> Found {len(extracted_data)} entries.")
-        except Exception as e:
-            messagebox.showerror("OCR Error", f"Failed processing {os.path.basename(filepath)}:\n{e}")
-            traceback.print_exc()
-            self.status_label.config(text=f"Error processing {os.path.basename(filepath)}.")
-        finally:
-            # Re-enable buttons
-            self.bulk_process_selected_button.config(state=tk.NORMAL)
-            self.bulk_process_all_button.config(state=tk.NORMAL)
+
+        def handle_event(event):
+            if folder_path != self.bulk_folder_path:
+                return # Folder changed while OCR was running, results are stale
+            if event.kind == ocr_jobs.RESULT:
+                self.bulk_results_map[filepath] = event.rows # Store/update results
+                if filepath == self.bulk_selected_filepath:
+                    self.display_data_on_sheet(event.rows, sheet_widget=self.bulk_data_sheet)
+                    self.bulk_save_selected_button.config(state=tk.NORMAL)
+                self.status_label.config(text=f"Processed {os.path.basename(filepath)}. Edit sheet and save if needed.")
+                # Enable relevant save buttons
+                self.bulk_save_all_button.config(state=tk.NORMAL if self.bulk_results_map else tk.DISABLED)
+                print(f" -> Found {len(event.rows)} entries.")
+            elif event.kind == ocr_jobs.ERROR:
+                messagebox.showerror("OCR Error", f"Failed processing {os.path.basename(filepath)}:\n{event.error}")
+                self.status_label.config(text=f"Error processing {os.path.basename(filepath)}.")
+
+        if self._start_ocr_job([filepath], handle_event):
+            self.status_label.config(text=f"Processing {os.path.basename(filepath)}...")
 
     def process_all_bulk(self):
-        """Processes all images listed in the bulk tab listbox."""
+        """Processes all images listed in the bulk tab listbox on the multi-process bulk engine, in the background."""
         if not self.bulk_image_files:
             messagebox.showwarning("Warning", "No images loaded in the list.")
             return
             
-        print(f"Processing all {len(self.bulk_image_files)} bulk images...")
-        self.status_label.config(text=f"Processing 0/{len(self.bulk_image_files)} images...")
-        self.master.update_idletasks()
-        # Disable buttons
-        self.bulk_process_selected_button.config(state=tk.DISABLED)
-        self.bulk_process_all_button.config(state=tk.DISABLED)
-        self.bulk_save_selected_button.config(state=tk.DISABLED)
-        self.bulk_save_all_button.config(state=tk.DISABLED)
-        
-        processed_count = 0
-        errors_occurred = False
-        self.bulk_results_map.clear() # Clear previous bulk results
-        
-        for i, filepath in enumerate(self.bulk_image_files):
-            filename = os.path.basename(filepath)
-            self.status_label.config(text=f"Processing {i+1}/{len(self.bulk_image_files)}: {filename}...")
-            self.master.update_idletasks()
-            try:
-                extracted_data = ocr_processor.extract_data_easyocr(filepath)
-                self.bulk_results_map[filepath] = extracted_data
-                processed_count += 1
-                print(f" -> Processed {filename}: Found {len(extracted_data)} entries.")
+        total = len(self.bulk_image_files)
+        num_workers = self.bulk_workers_var.get()
+        folder_path = self.bulk_folder_path
+        counters = {'processed': 0, 'errors': 0, 'cache_hits': 0, 'model_load': 0.0, 'inference': 0.0}
+
+        def handle_event(event):
+            if folder_path != self.bulk_folder_path:
+                return # Folder changed while OCR was running, results are stale
+            if event.kind == ocr_jobs.RESULT:
+                filename = os.path.basename(event.filepath)
+                self.bulk_results_map[event.filepath] = event.rows
+                counters['processed'] += 1
+                counters['model_load'] += event.timings.get('model_load', 0.0)
+                counters['inference'] += event.timings.get('inference', 0.0)
+                if event.timings.get('cache_hit'):
+                    counters['cache_hits'] += 1
+                print(f" -> Processed {filename}: Found {len(event.rows)} entries.")
                 # Display results if this is the currently selected image
-                if filepath == self.bulk_selected_filepath:
-                    self.display_data_on_sheet(extracted_data, sheet_widget=self.bulk_data_sheet)
+                if event.filepath == self.bulk_selected_filepath:
+                    self.display_data_on_sheet(event.rows, sheet_widget=self.bulk_data_sheet)
                     self.bulk_save_selected_button.config(state=tk.NORMAL) # Enable save for current selection
-            except Exception as e:
-                errors_occurred = True
-                print(f" -> ERROR processing {filename}: {e}")
-                # Optionally show error popup per file, or just log/status update
-                # messagebox.showerror("OCR Error", f"Failed processing {filename}:\n{e}", parent=self.bulk_tab)
-        
-        # Update status after processing all
-        final_status = f"Bulk processing complete. {processed_count}/{len(self.bulk_image_files)} images processed."
-        if errors_occurred:
-            final_status += " Some errors occurred (see console)."
-        self.status_label.config(text=final_status)
-        
-        if self.bulk_results_map: # Enable Save All if any results were stored
-            self.bulk_save_all_button.config(state=tk.NORMAL)
-        
-        # Re-enable process buttons, keep save selected disabled unless current item was processed
-        self.bulk_process_selected_button.config(state=tk.NORMAL)
-        self.bulk_process_all_button.config(state=tk.NORMAL)
-        if self.bulk_selected_filepath not in self.bulk_results_map:
-            self.bulk_save_selected_button.config(state=tk.DISABLED)
-            
-    def save_selected_bulk(self):
-        """Saves data for selected rows in the bulk processing treeview."""
-        selected_items = self.bulk_tree.selection()
-        if not selected_items:
-            messagebox.showwarning("Warning", "No items selected.")
-            return
+                self.bulk_save_all_button.config(state=tk.NORMAL)
+                self.status_label.config(text=f"Processed {event.done}/{total}: {filename}")
+            elif event.kind == ocr_jobs.ERROR:
+                counters['errors'] += 1
+                print(f" -> ERROR processing {os.path.basename(event.filepath or '')}: {event.error}")
+                self.status_label.config(text=f"Processed {event.done}/{total} (with errors)")
+            elif event.kind == ocr_jobs.FINISHED:
+                # Update status after processing all
+                processed_count = counters['processed']
+                final_status = "Bulk processing cancelled." if event.cancelled else "Bulk processing complete."
+                final_status += f" {processed_count}/{total} images processed ({counters['cache_hits']} from cache)."
+                final_status += f" Model load {counters['model_load']:.2f}s, OCR {counters['inference']:.2f}s"
+                if processed_count:
+                    final_status += f" ({counters['inference'] / processed_count:.2f}s/image)."
+                else:
+                    final_status += "."
+                if counters['errors']:
+                    final_status += " Some errors occurred (see console)."
+                self.status_label.config(text=final_status)
+                if self.bulk_selected_filepath not in self.bulk_results_map:
+                    self.bulk_save_selected_button.config(state=tk.DISABLED)
 
-        processed_count = 0
-        error_count = 0
-        saved_count = 0
-        
-        for item_id in selected_items:
-            values = self.bulk_tree.item(item_id, 'values')
-            tags = self.bulk_tree.item(item_id, 'tags')
+        if not self._start_ocr_job(self.bulk_image_files, handle_event, max_workers=num_workers):
+            return
+        print(f"Processing all {total} bulk images with {num_workers} worker(s)...")
+        self.status_label.config(text=f"Processing 0/{total} images...")
+        self.bulk_results_map.clear() # Clear previous bulk results
+        self.bulk_save_selected_button.config(state=tk.DISABLED)
+        self.bulk_save_all_button.config(state=tk.DISABLED)
             
-            # Check if already processed or has errors
-            if 'processed' in tags or 'error' in tags:
-                 print(f"Skipping already processed/error item: {item_id}")
-                 continue
-
-            filepath = values[0]
-            sheet_data = eval(values[1]) # Safely evaluate the string representation of the list
-
-            if not isinstance(sheet_data, list):
-                 messagebox.showerror("Error", f"Invalid data format for item {item_id}")
-                 error_count += 1
-                 self.bulk_tree.item(item_id, tags=('error',))
-                 continue
-
-            valid_rows_to_save, errors = self.validate_sheet_data(sheet_data)
-
-            if errors:
-                messagebox.showerror("Validation Error", f"Errors in data for {os.path.basename(filepath)}:\\n{chr(10).join(errors)}")
-                error_count += 1
-                self.bulk_tree.item(item_id, tags=('error',))
-                continue
-
-            # Get image ID (add image to DB if not already there)
+    # --- Background OCR Job Methods ---
+    def _start_ocr_job(self, filepaths, handler, max_workers=None):
+        """Starts a background OCR job. `handler` receives each job event on the Tk thread."""
+        if self.ocr_job is not None:
+            messagebox.showwarning("Busy", "An OCR job is already running. Wait for it to finish or cancel it first.")
+            return False
+
+        self.ocr_job = ocr_jobs.OcrJob(filepaths, max_workers=max_workers)
+        self.ocr_job_handler = handler
+        self._set_ocr_buttons_state(tk.DISABLED)
+        self.job_progress.config(maximum=max(1, len(filepaths)), value=0)
+        self.job_status_label.config(text=f"OCR: 0/{len(filepaths)} images")
+        self.job_cancel_button.config(state=tk.NORMAL)
+        self.ocr_job.start()
+        self.master.after(OCR_POLL_MS, self._poll_ocr_job)
+        return True
+
+    def _poll_ocr_job(self):
+        """Drains pending job events on the Tk thread and reschedules itself until the job finishes."""
+        job = self.ocr_job
+        if job is None:
+            return
+        while True:
             try:
-                # Get or create Image ID 
-                image_id = self._get_or_create_image_id(filepath)
-                # ~~ with open(filepath, 'rb') as f: image_blob = f.read() ~~
-                # ~~ image_id = database.add_image(filepath, image_blob) ~~
-                # ~~ if image_id is None: ~~
-                # ~~      raise ValueError("Failed to get or add image ID to database.") ~~
-                     
-                # Proceed with saving
-                database.clear_extracted_data_for_image(image_id)
-                current_item_saved_count = 0
-                for username, level, class_name, friend_bool in valid_rows_to_save:
-                    database.add_extracted_data(image_id, username, level, class_name, friend_bool) # Pass friend_bool
-                    current_item_saved_count += 1
-                
-                self.bulk_tree.item(item_id, tags=('processed',))
-                saved_count += current_item_saved_count
-                processed_count += 1
-                print(f"Successfully saved {current_item_saved_count} entries for image ID {image_id} ({os.path.basename(filepath)})")
-
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            self.job_progress.config(value=event.done)
+            if event.kind == ocr_jobs.PROGRESS and event.filepath:
+                self.job_status_label.config(text=f"OCR: {event.done}/{event.total} - {os.path.basename(event.filepath)}")
+            elif event.kind in (ocr_jobs.RESULT, ocr_jobs.ERROR):
+                self.job_status_label.config(text=f"OCR: {event.done}/{event.total} images")
+            try:
+                self.ocr_job_handler(event)
+            except Exception:
+                traceback.print_exc()
+            if event.kind == ocr_jobs.FINISHED:
+                self._finish_ocr_job(event)
+                return
+        self.master.after(OCR_POLL_MS, self._poll_ocr_job)
+
+    def _finish_ocr_job(self, event):
+        """Resets the job bar and re-enables the OCR buttons once a job is over."""
+        self.ocr_job = None
+        self.ocr_job_handler = None
+        outcome = "cancelled" if event.cancelled else "finished"
+        self.job_status_label.config(text=f"OCR {outcome}: {event.done}/{event.total} images")
+        self.job_cancel_button.config(state=tk.DISABLED)
+        self._set_ocr_buttons_state(tk.NORMAL)
+
+    def cancel_ocr_job(self):
+        """Command for the job bar Cancel button."""
+        if self.ocr_job is not None:
+            self.ocr_job.cancel()
+            self.job_status_label.config(text="Cancelling OCR job...")
+            self.job_cancel_button.config(state=tk.DISABLED)
+
+    def _set_ocr_buttons_state(self, state):
+        """Enables/disables every button that starts OCR.
+
+        Only buttons with something to process are enabled, and none while an OCR job is running.
+        """
+        enable = state == tk.NORMAL and self.ocr_job is None
+        self.process_button.config(state=tk.NORMAL if enable and self.current_image_path else tk.DISABLED)
+        self.bulk_process_selected_button.config(state=tk.NORMAL if enable and self.bulk_selected_filepath else tk.DISABLED)
+        self.bulk_process_all_button.config(state=tk.NORMAL if enable and self.bulk_image_files else tk.DISABLED)
+
+    def _bulk_rows_for_file(self, filepath):
+        """Returns sheet-style rows for a processed bulk file, using the live sheet for the selected one."""
+        if filepath == self.bulk_selected_filepath:
+            return self.bulk_data_sheet.get_sheet_data() # Includes the user's edits
+        return [[entry.get('username', ''), str(entry.get('level', '')), entry.get('class', ''),
+                 bool(entry.get('friend', False))] for entry in self.bulk_results_map.get(filepath, [])]
 
-            except Exception as e:
-                messagebox.showerror("Error", f"Error saving data for {os.path.basename(filepath)}: {e}")
-                self.bulk_tree.item(item_id, tags=('error',))
-                error_count += 1
-                print(f"Error saving data for {filepath}: {e}")
+    def save_selected_bulk(self):
+        """Saves the (possibly edited) sheet data of the image selected in the bulk list."""
+        filepath = self.bulk_selected_filepath
+        if not filepath or filepath not in self.bulk_results_map:
+            messagebox.showwarning("Warning", "No processed image selected.")
+            return
 
+        valid_rows_to_save, errors = self.validate_sheet_data(self._bulk_rows_for_file(filepath))
+        if errors:
+            messagebox.showwarning("Validation Error", "Errors found:\n" + "\n".join(errors) + "\n\nPlease correct and save again.")
+            return
+        if not valid_rows_to_save:
+            messagebox.showinfo("Save", "No valid data rows found in the sheet to save.")
+            return
 
-        messagebox.showinfo("Bulk Save Complete", f"Processed: {processed_count}\\nSaved Entries: {saved_count}\\nErrors: {error_count}")
-        self.load_bulk_data() # Refresh view
+        try:
+            image_id = self._get_or_create_image_id(filepath)
+            saved_count = database.replace_extracted_data(image_id, valid_rows_to_save)
+            if saved_count is None:
+                raise RuntimeError("Database rejected the rows (see console). Nothing was changed.")
+            print(f"Successfully saved {saved_count} entries for image ID {image_id} ({os.path.basename(filepath)})")
+            messagebox.showinfo("Success", f"{saved_count} data entries saved for {os.path.basename(filepath)}.")
+            self.apply_database_changes() # Update all data tab and manage tab listbox
+        except Exception as e:
+            messagebox.showerror("Database Error", f"Error saving data for {os.path.basename(filepath)}: {e}")
+            traceback.print_exc()
 
     def save_all_bulk(self):
-        """Attempts to save data for ALL non-processed/non-error rows."""
-        all_items = self.bulk_tree.get_children('')
-        if not all_items:
-            messagebox.showwarning("Warning", "No items to process.")
+        """Saves data for ALL processed images in the bulk folder in a single transaction."""
+        if not self.bulk_results_map:
+            messagebox.showwarning("Warning", "No processed images to save.")
             return
 
-        processed_count = 0
-        error_count = 0
-        saved_count = 0
-
-        for item_id in all_items:
-            values = self.bulk_tree.item(item_id, 'values')
-            tags = self.bulk_tree.item(item_id, 'tags')
-            
-            # Skip already processed or errored items
-            if 'processed' in tags or 'error' in tags:
-                print(f"Skipping already processed/error item: {item_id}")
-                continue
-
-            filepath = values[0]
-            sheet_data_str = values[1]
-
-            try:
-                sheet_data = eval(sheet_data_str) # Safely evaluate the string
-                if not isinstance(sheet_data, list):
-                    raise TypeError("Evaluated data is not a list.")
-            except Exception as e:
-                messagebox.showerror("Data Error", f"Invalid data format for {os.path.basename(filepath)}: {e}")
-                self.bulk_tree.item(item_id, tags=('error',))
-                error_count += 1
-                print(f"Error evaluating data for {filepath}: {e}")
-                continue
-
-
-            valid_rows_to_save, errors = self.validate_sheet_data(sheet_data)
-
-            if errors:
-                messagebox.showerror("Validation Error", f"Errors in data for {os.path.basename(filepath)}:\\n{chr(10).join(errors)}")
-                self.bulk_tree.item(item_id, tags=('error',))
-                error_count += 1
-                continue
-
-            # Get image ID
-            try:
-                # Get or create Image ID
-                image_id = self._get_or_create_image_id(filepath)
-                # ~~ with open(filepath, 'rb') as f: image_blob = f.read() ~~
-                # ~~ image_id = database.add_image(filepath, image_blob) ~~
-                # ~~ if image_id is None: raise ValueError("Failed to get image ID") ~~
-                
-                database.clear_extracted_data_for_image(image_id)
-                current_item_saved_count = 0
-                for username, level, class_name, friend_bool in valid_rows_to_save:
-                    database.add_extracted_data(image_id, username, level, class_name, friend_bool) # Pass friend_bool
-                    current_item_saved_count += 1
-
-                self.bulk_tree.item(item_id, tags=('processed',))
-                saved_count += current_item_saved_count
-                processed_count += 1
-                print(f"Successfully saved {current_item_saved_count} entries for image ID {image_id} ({os.path.basename(filepath)})")
-
-
-            except Exception as e:
-                messagebox.showerror("Error", f"Error saving data for {os.path.basename(filepath)}: {e}")
-                self.bulk_tree.item(item_id, tags=('error',))
-                error_count += 1
-                print(f"Error saving data for {filepath}: {e}")
-
+        items = [] # (image_id, rows) pairs for the bulk insert
+        error_messages = []
+        skipped_count = 0
+        try:
+            # Image inserts and data replacement all commit together
+            with database.transaction():
+                for filepath in self.bulk_image_files:
+                    if filepath not in self.bulk_results_map:
+                        continue
+                    filename = os.path.basename(filepath)
+                    valid_rows_to_save, errors = self.validate_sheet_data(self._bulk_rows_for_file(filepath))
+                    if errors:
+                        error_messages.append(f"{filename}: " + "; ".join(errors))
+                        continue
+                    if not valid_rows_to_save:
+                        skipped_count += 1
+                        continue
+                    items.append((self._get_or_create_image_id(filepath), valid_rows_to_save))
+
+                saved_count = database.replace_extracted_data_many(items)
+                if saved_count is None:
+                    raise RuntimeError("Database rejected the rows (see console). Nothing was changed.")
+        except Exception as e:
+            messagebox.showerror("Database Error", f"Failed to save bulk data: {e}")
+            traceback.print_exc()
+            return
 
-        messagebox.showinfo("Bulk Save Complete", f"Processed: {processed_count}\\nSaved Entries: {saved_count}\\nErrors: {error_count}")
-        self.load_bulk_data() # Refresh view
+        print(f"Bulk save: {saved_count} entries for {len(items)} images.")
+        summary = f"Saved Images: {len(items)}\nSaved Entries: {saved_count}\nSkipped (no data): {skipped_count}\nErrors: {len(error_messages)}"
+        if error_messages:
+            summary += "\n\n" + "\n".join(error_messages)
+        messagebox.showinfo("Bulk Save Complete", summary)
+        self.apply_database_changes() # Update all data tab and manage tab listbox
 
     def _on_proc_canvas_configure(self, event):
         """Handles canvas configure event for the processing tab image canvas."""
-        # Call the display helper with the currently loaded PIL image for this tab
-        self._display_image_on_canvas(self.image_canvas, self.current_pil_image)
+        # Redraws the image shown on it; rapid resizes are coalesced
+        self.image_renderer.resized(self.image_canvas)
 
     def _on_bulk_canvas_configure(self, event):
         """Handles canvas configure event for the bulk tab image canvas."""
-        # Call the display helper with the currently loaded PIL image for this tab
-        self._display_image_on_canvas(self.bulk_image_canvas, self.bulk_tab_pil_image)
+        # Redraws the image shown on it; rapid resizes are coalesced
+        self.image_renderer.resized(self.bulk_image_canvas)
 
     def _on_manage_canvas_configure(self, event):
         """Handles canvas configure event for the manage tab image canvas."""
-        # Call the display helper with the currently loaded PIL image for this tab
-        self._display_image_on_canvas(self.manage_image_canvas, self.manage_tab_pil_image)
+        # Redraws the image shown on it; rapid resizes are coalesced
+        self.image_renderer.resized(self.manage_image_canvas)
 
     def export_data_to_csv(self):
-        """Exports the current data in the treeview (respecting filter) to a CSV file."""
-        if not self.displayed_tree_data:
+        """Exports the rows shown in the All Data view (respecting filter and sort) to a CSV file."""
+        if not self.data_view.total_rows:
             messagebox.showinfo("Info", "No data currently displayed to export.")
             return
 
@@ -1304,34 +1310,16 @@ Is ADB installed and in PATH? Is a device connected and authorized?")
             # Define CSV header
             header = ["Username", "Level", "Class", "Friend", "Extraction Date", "Image File Path"]
 
-            # Prepare data for CSV export (select and format needed columns)
-            csv_data = []
-            for row in self.displayed_tree_data:
-                # Extract data based on the structure in load_data_into_treeview
-                # (db_id, image_id, file_path, username, level, class_name, friend, timestamp_str)
-                file_path = row[2] if row[2] else "N/A"
-                username = row[3]
-                level = row[4] if row[4] is not None else ""
-                class_name = row[5] if row[5] else ""
-                friend = row[6] # Get friend value (0 or 1)
-                timestamp_str = row[7] # Index shifted
-                
-                friend_display = "Yes" if friend else "No" # Format for CSV
-
-                # Re-format date for consistency (optional, but good practice)
-                try:
-                    dt_obj = datetime.datetime.fromisoformat(timestamp_str)
-                    formatted_date = dt_obj.strftime("%Y-%m-%d %H:%M:%S")
-                except: 
-                    formatted_date = timestamp_str # Fallback to original string
-                
-                csv_data.append([username, level, class_name, friend_display, formatted_date, file_path])
-
-            # Write data to CSV file
+            # Rows are streamed from the database straight into the file
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile: # Specify encoding
                 csvwriter = csv.writer(csvfile)
                 csvwriter.writerow(header) # Write the header
-                csvwriter.writerows(csv_data) # Write the data rows
+                for row in database.iter_extracted_data(**self._tree_query_args()):
+                    username, level, class_name, friend_display, formatted_date = self._format_tree_row(row)
+                    file_path = row[2] if row[2] else "N/A"
+                    level = level if level is not None else ""
+                    class_name = class_name if class_name else ""
+                    csvwriter.writerow([username, level, class_name, friend_display, formatted_date, file_path])
 
             messagebox.showinfo("Success", f"Data successfully exported to:\n{filename}")
         except Exception as e:
@@ -0,0 +1,148 @@
+import os
+import threading
+import collections
+from PIL import Image
+
+# Memory budget for decoded screenshots and the scaled copies shown on the
+# canvases. Least recently used entries are dropped beyond it.
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("ORNA_IMAGE_CACHE_MB", "256")) * 1024 * 1024
+
+
+def file_key(path):
+    """Identity of an image file; changes when the file is rewritten."""
+    stat = os.stat(path)
+    return ('file', os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def db_key(image_id):
+    """Identity of an image stored in the database (stored images never change)."""
+    return ('db', image_id)
+
+
+def fit_size(image_size, box):
+    """Size of `image_size` scaled down to fit in `box`, keeping its aspect ratio (never enlarged)."""
+    width, height = image_size
+    scale = min(box[0] / width, box[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _image_bytes(pil_image):
+    return pil_image.width * pil_image.height * len(pil_image.getbands())
+
+
+class ImageCache:
+    """In-memory LRU cache of decoded images and of PhotoImages scaled for display.
+
+    Decoded images (and reduced copies for previews) are keyed by image
+    identity (see file_key and db_key), scaled PhotoImages by identity and
+    displayed size, so re-selecting an image or switching back to a tab
+    neither decodes nor resamples it again. Cached images are shared:
+    callers must not modify them.
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict() # key -> (value, size in bytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, value, size):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # Keep the newest entry even if it alone is over budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_image(self, key, load):
+        """Returns the decoded image for `key`, calling `load()` to decode it on a miss.
+
+        `load` returns a PIL image (or None, which is not cached).
+        """
+        pil_image = self._get(('image', key))
+        if pil_image is None:
+            pil_image = load()
+            if pil_image is None:
+                return None
+            pil_image.load() # Decode now, so the cached copy never touches the source again
+            self._put(('image', key), pil_image, _image_bytes(pil_image))
+        return pil_image
+
+    def get_photo(self, key, size):
+        """Returns the cached PhotoImage of image `key` at `size`, or None."""
+        return self._get(('photo', key, size))
+
+    def put_photo(self, key, size, photo_image):
+        """Caches a full-quality PhotoImage of image `key` scaled to `size`."""
+        self._put(('photo', key, size), photo_image, size[0] * size[1] * 4)
+
+    def get_preview_base(self, key, pil_image, max_size):
+        """Returns a copy of `pil_image` reduced (by an integer factor) to about `max_size` pixels on its longer side.
+
+        Quick previews are scaled from it, so they never touch the full-resolution image.
+        """
+        base = self._get(('preview', key))
+        if base is None:
+            factor = max(1, -(-max(pil_image.size) // max_size)) # Ceiling division
+            if factor == 1:
+                base = pil_image
+            else:
+                try:
+                    base = pil_image.reduce(factor)
+                except ValueError:
+                    # reduce() rejects some modes, e.g. palette ("P") and 1-bit PNGs
+                    base = pil_image.resize((-(-pil_image.width // factor), -(-pil_image.height // factor)),
+                                            Image.Resampling.BILINEAR)
+            self._put(('preview', key), base, _image_bytes(base) if factor > 1 else 0)
+        return base
+
+    def discard(self, key):
+        """Drops everything cached for an image, e.g. after it was deleted."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[1] == key]:
+                self._bytes -= self._entries.pop(entry_key)[1]
+
+    def stats(self):
+        """Returns a dict with hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_image_cache():
+    """Returns the process-wide image cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache()
+    return _cache
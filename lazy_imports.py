@@ -0,0 +1,35 @@
+import os
+import time
+import importlib
+import threading
+
+# Modules only needed for OCR or device capture. The GUI does not import them
+# at startup; they are imported on first use, or preloaded in the background
+# once the window is up. Set ORNA_PRELOAD=0 to skip the preloading.
+PRELOAD_MODULES = ("ocr_processor", "easyocr", "adbutils")
+PRELOAD_ENABLED = os.environ.get("ORNA_PRELOAD", "1") == "1"
+
+
+def _preload(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[Startup] Could not preload {name}: {e}")
+            continue
+        print(f"[Startup] Preloaded {name} in {time.perf_counter() - start:.2f}s")
+
+
+def preload_in_background(modules=PRELOAD_MODULES):
+    """Imports `modules` on a daemon thread, so the first OCR job or capture does not pay for them.
+
+    A caller that needs a module before the thread has got to it simply
+    imports it; Python's import lock makes it wait for (or do) the import.
+    Returns the thread, or None if preloading is disabled.
+    """
+    if not PRELOAD_ENABLED:
+        return None
+    thread = threading.Thread(target=_preload, args=(modules,), name="Preload", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Location of the persistent OCR result cache. Set ORNA_OCR_CACHE to an empty
+# string to disable caching entirely.
+OCR_CACHE_PATH = os.environ.get("ORNA_OCR_CACHE", "ocr_cache.db")
+OCR_CACHE_MAX_BYTES = int(os.environ.get("ORNA_OCR_CACHE_MB", "64")) * 1024 * 1024
+
+
+def make_cache_key(image_bytes, params):
+    """Builds a cache key from the raw image bytes and the pipeline parameters.
+
+    `params` must be JSON serialisable; any change to it (crop area, class list
+    version, confidence threshold...) produces a different key.
+    """
+    digest = hashlib.sha256(image_bytes)
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _boxes_to_json(ocr_results):
+    """Converts EasyOCR (bbox, text, prob) tuples (which may hold numpy types) to plain JSON."""
+    return json.dumps([
+        [[[float(x), float(y)] for x, y in bbox], str(text), float(prob)]
+        for bbox, text, prob in ocr_results
+    ])
+
+
+class CacheEntry:
+    """A cached OCR result: the raw readtext boxes and the parsed rows."""
+
+    def __init__(self, boxes, rows):
+        self.boxes = boxes # List of (bbox, text, prob)
+        self.rows = rows # List of {'username', 'level', 'class'} dicts
+
+
+class OcrResultCache:
+    """Persistent, size-bounded LRU cache of OCR results stored in SQLite.
+
+    Safe to share between threads, and between processes (each process opens
+    its own connection to the same file).
+    """
+
+    def __init__(self, path=OCR_CACHE_PATH, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    key TEXT PRIMARY KEY,
+                    boxes TEXT NOT NULL,
+                    rows TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used)")
+        return self._conn
+
+    def get(self, key):
+        """Returns the CacheEntry for `key`, or None on a miss."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT boxes, rows FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.hits += 1
+            return CacheEntry(json.loads(row[0]), json.loads(row[1]))
+        except Exception as e:
+            print(f"Warning: OCR cache lookup failed: {e}")
+            return None
+
+    def put(self, key, ocr_results, rows):
+        """Stores the raw boxes and parsed rows for `key`, evicting old entries if needed."""
+        try:
+            boxes_json = _boxes_to_json(ocr_results)
+            rows_json = json.dumps(rows)
+            size = len(boxes_json) + len(rows_json)
+            with self._lock:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO ocr_cache (key, boxes, rows, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                             (key, boxes_json, rows_json, size, time.time()))
+                self._evict(conn)
+        except Exception as e:
+            print(f"Warning: Could not store OCR result in cache: {e}")
+
+    def _evict(self, conn):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_delete = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_used ASC"):
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM ocr_cache WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self._lock:
+            self._connect().execute("DELETE FROM ocr_cache")
+
+    def stats(self):
+        """Returns hit/miss counters for this process plus the size of the cache."""
+        with self._lock:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_ocr_cache():
+    """Returns the process-wide OCR cache, or None if caching is disabled."""
+    global _cache
+    if not OCR_CACHE_PATH:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OcrResultCache()
+    return _cache
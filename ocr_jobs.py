@@ -0,0 +1,106 @@
+import queue
+import threading
+import traceback
+import bulk_engine
+
+# Event kinds published on OcrJob.events
+PROGRESS = "progress" # An image is about to be processed
+RESULT = "result" # An image finished successfully
+ERROR = "error" # An image failed
+FINISHED = "finished" # The job is over (completed or cancelled)
+
+
+class JobEvent:
+    """A single progress/result/error/finished notification from a background job."""
+
+    def __init__(self, kind, filepath=None, done=0, total=0, rows=None, error=None, timings=None, cancelled=False):
+        self.kind = kind
+        self.filepath = filepath
+        self.done = done # Number of images finished so far
+        self.total = total
+        self.rows = rows
+        self.error = error
+        self.timings = timings or {}
+        self.cancelled = cancelled # Only meaningful on FINISHED events
+
+
+class OcrJob:
+    """Runs OCR for a list of images on a background thread.
+
+    Nothing in here touches Tk. The GUI drains `events` from the main thread
+    (e.g. with `after()` polling) and updates its widgets from there.
+    With `max_workers` set, the images are handed to the multi-process
+    BulkOcrEngine; otherwise they are processed in-process with the shared
+    reader pool.
+    """
+
+    def __init__(self, filepaths, max_workers=None):
+        self.filepaths = list(filepaths)
+        self.max_workers = max_workers
+        self.events = queue.Queue()
+        self.cancelled = False
+        self.finished = False
+        self._cancel_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="OcrJob", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Requests cancellation. Images already being processed still finish."""
+        self._cancel_event.set() # Also watched by the bulk engine's run
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _publish(self, kind, **kwargs):
+        self.events.put(JobEvent(kind, total=len(self.filepaths), **kwargs))
+
+    def _run(self):
+        done = 0
+        try:
+            if self.max_workers:
+                done = self._run_bulk_engine()
+            else:
+                done = self._run_in_process()
+        except Exception as e:
+            traceback.print_exc()
+            self._publish(ERROR, done=done, error=f"{type(e).__name__}: {e}")
+        finally:
+            self.cancelled = self._cancel_event.is_set()
+            self.finished = True
+            self._publish(FINISHED, done=done, cancelled=self.cancelled)
+
+    def _run_in_process(self):
+        import ocr_processor # Heavy (OCR models, OpenCV), so only imported once a job runs
+        done = 0
+        for filepath in self.filepaths:
+            if self._cancel_event.is_set():
+                break
+            self._publish(PROGRESS, filepath=filepath, done=done)
+            try:
+                timings = {}
+                rows = ocr_processor.extract_data_easyocr(filepath, timings=timings)
+                done += 1
+                self._publish(RESULT, filepath=filepath, done=done, rows=rows, timings=timings)
+            except Exception as e:
+                traceback.print_exc()
+                done += 1
+                self._publish(ERROR, filepath=filepath, done=done, error=f"{type(e).__name__}: {e}")
+        return done
+
+    def _run_bulk_engine(self):
+        done = 0
+        # The shared engine keeps its worker processes (and their loaded models) between jobs
+        engine = bulk_engine.get_bulk_engine(max_workers=self.max_workers)
+        if self._cancel_event.is_set():
+            return done
+        self._publish(PROGRESS, done=done)
+        for result in engine.run(self.filepaths, cancel_event=self._cancel_event):
+            done += 1
+            if result.ok:
+                self._publish(RESULT, filepath=result.filepath, done=done, rows=result.rows, timings=result.timings)
+            else:
+                self._publish(ERROR, filepath=result.filepath, done=done, error=result.error)
+        return done
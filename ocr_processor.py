@@ -1,11 +1,17 @@
-import cv2
-import pytesseract
-import re
 import numpy as np
 from PIL import Image
 import os
-import pandas as pd # Import pandas for easier data handling
-import easyocr # Import easyocr
+import io
+import time
+import hashlib
+from reader_pool import get_reader_pool
+from ocr_cache import get_ocr_cache, make_cache_key
+import class_vocab
+import card_layout
+import card_template
+import preprocess
+import debug_artifacts
+import crop_calibration
 
 CLASSES = [
     # Image 1
@@ -54,183 +60,332 @@ CLASSES = [
     "Augur", "Gladiator", "Runeblade"
 ]
 
+# Normalised once at import: duplicates and stray whitespace removed, trie built
+CLASS_VOCABULARY = class_vocab.ClassVocabulary(CLASSES)
+
+# Changes whenever the class list is edited, so cached results are invalidated
+CLASSES_VERSION = CLASS_VOCABULARY.version
+
+# Bump when the parsing logic changes in a way that affects extracted rows
+PIPELINE_VERSION = 4
+
+# Crop area as fractions of the screenshot size: (left, top, right, bottom)
+# Adjust crop area based on user feedback
+# CROP_RATIOS = (0, 0.1, 0.7, 0.8) # Old values
+CROP_RATIOS = (0.14, 0.18, 0.51, 0.75) # New values
+
+# OCR boxes below this confidence are treated as noise
+MIN_CONFIDENCE = 0.30
+
+# Number of text boxes the recognizer reads per forward pass
+RECOGNIZER_BATCH_SIZE = 16
+
+# Number of screenshots extract_data_batch sends through EasyOCR at once
+DEFAULT_BATCH_SIZE = int(os.environ.get("ORNA_OCR_BATCH_SIZE", "4"))
+
+# Preprocessing applied to every crop before OCR, e.g. "gray,height=32,clahe".
+# See preprocess.PreprocessSettings.from_spec; empty leaves the crop untouched.
+PREPROCESSING = preprocess.PreprocessSettings.from_spec(os.environ.get("ORNA_OCR_PREPROCESS", ""))
+
+# Template mode: recognise only the text lines found by a projection profile,
+# skipping the text detector. Falls back to full detection on low confidence.
+TEMPLATE_MODE = os.environ.get("ORNA_OCR_TEMPLATE", "0") == "1"
+
 # --- Implementation using easyocr --- 
 
-# Initialize EasyOCR Reader (do this once, ideally outside the function if called repeatedly)
-# This will download models on first run
-# reader = easyocr.Reader(['en']) # Add other languages if needed e.g., ['en', 'fr']
+def get_crop_area(width, height, screenshot=None):
+    """Returns the pixel crop box for a screenshot of the given size.
 
-def get_ocr_results(image_path):
-    """Extracts player data using EasyOCR."""
-    # Initialize reader here for simplicity in testing
-    # Consider moving initialization outside for efficiency in real app
-    # Specify gpu=False if you don't have a compatible GPU or CUDA installed
-    reader = easyocr.Reader(['en'], gpu=False) 
-    
-    # 1. Use PIL to open and crop the image (same as Tesseract version)
-    img_pil = Image.open(image_path)
-    width, height = img_pil.size
-    # Adjust crop area based on user feedback
-    # crop_area = (0, int(height * 0.1), int(width * 0.7), int(height * 0.8)) # Old values
-    crop_area = (int(width * 0.14), int(height * 0.18), int(width * 0.51), int(height * 0.75)) # New values
-    cropped_img_pil = img_pil.crop(crop_area)
-    
-    # --- Add code to save the processed image ---
-    processed_dir = "processed_images"
-    if not os.path.exists(processed_dir):
-        os.makedirs(processed_dir)
-    base_filename = os.path.basename(image_path)
-    name, ext = os.path.splitext(base_filename)
-    processed_filename = f"{name}_processed{ext}"
-    processed_save_path = os.path.join(processed_dir, processed_filename)
-    try:
-        cropped_img_pil.save(processed_save_path)
-        # print(f"Saved processed image to: {processed_save_path}") # Optional: uncomment for confirmation
-    except Exception as save_err:
-        print(f"Warning: Could not save processed image to {processed_save_path}: {save_err}")
-    # --- End save code ---
-
-    # Convert PIL image to format easyocr needs (numpy array or filepath)
-    # Using numpy array from PIL image:
-    cropped_img_np = np.array(cropped_img_pil)
-
-    # 2. Perform OCR using EasyOCR
-    ocr_results = reader.readtext(cropped_img_np, detail=1, paragraph=False) # paragraph=False gives word boxes
+    With crop calibration on and a `screenshot` (array or PIL image) given, the
+    box comes from the calibrated profile for this resolution, detected from
+    the screenshot the first time the resolution is seen. Otherwise it is
+    computed from CROP_RATIOS.
+    """
+    left, top, right, bottom = CROP_RATIOS
+    default_box = (int(width * left), int(height * top), int(width * right), int(height * bottom))
+    if crop_calibration.CALIBRATION_ENABLED and screenshot is not None:
+        return crop_calibration.get_crop_box(width, height, screenshot, default_box)
+    return default_box
+
+def get_cache_params(crop_box=None):
+    """Everything besides the image bytes that affects the extracted rows."""
+    return {
+        'crop': list(crop_box) if crop_box is not None else CROP_RATIOS,
+        'classes_version': CLASSES_VERSION,
+        'min_confidence': MIN_CONFIDENCE,
+        'class_match_score': class_vocab.MIN_MATCH_SCORE,
+        'recognizer_batch_size': RECOGNIZER_BATCH_SIZE,
+        'template_mode': TEMPLATE_MODE,
+        'preprocess': PREPROCESSING.to_params(),
+        'pipeline_version': PIPELINE_VERSION,
+    }
+
+def open_screenshot(image, image_bytes=None):
+    """Returns an array or PIL image as is, and opens a path (or its `image_bytes`) lazily with PIL."""
+    if isinstance(image, (np.ndarray, Image.Image)):
+        return image
+    return Image.open(io.BytesIO(image_bytes) if image_bytes is not None else image)
+
+def get_screenshot_crop_area(screenshot):
+    """get_crop_area for an opened screenshot."""
+    if isinstance(screenshot, np.ndarray):
+        height, width = screenshot.shape[:2]
+    else:
+        width, height = screenshot.size
+    return get_crop_area(width, height, screenshot)
+
+def load_cropped_image(image, image_bytes=None, crop_box=None):
+    """Returns the cropped, preprocessed player list of a screenshot as a numpy array.
+
+    `image` is a file path (pass its contents as `image_bytes` if already read),
+    a PIL image or an RGB screenshot array. `crop_box` defaults to get_crop_area.
+    """
+    screenshot = open_screenshot(image, image_bytes)
+    if crop_box is None:
+        crop_box = get_screenshot_crop_area(screenshot)
+    if isinstance(screenshot, np.ndarray):
+        left, top, right, bottom = crop_box
+        return preprocess.preprocess(np.ascontiguousarray(screenshot[top:bottom, left:right]), PREPROCESSING)
+    return preprocess.preprocess(np.array(screenshot.crop(crop_box)), PREPROCESSING)
+
+def run_ocr(reader, crops):
+    """Runs OCR over equally sized crops and returns one readtext result list per crop.
+
+    In template mode the crops the template fits are read without detection;
+    the rest (or all of them, outside template mode) go through readtext, or
+    readtext_batched when there are several.
+    """
+    results = [None] * len(crops)
+    if TEMPLATE_MODE:
+        results = [card_template.recognize_cards(reader, crop, batch_size=RECOGNIZER_BATCH_SIZE) for crop in crops]
+
+    remaining = [i for i, result in enumerate(results) if result is None]
+    if len(remaining) == 1:
+        # paragraph=False gives word boxes
+        results[remaining[0]] = reader.readtext(crops[remaining[0]], detail=1, paragraph=False,
+                                                batch_size=RECOGNIZER_BATCH_SIZE)
+    elif remaining:
+        batch_results = reader.readtext_batched([crops[i] for i in remaining], detail=1, paragraph=False,
+                                                batch_size=RECOGNIZER_BATCH_SIZE)
+        for i, ocr_results in zip(remaining, batch_results):
+            results[i] = ocr_results
+    return results
+
+def get_ocr_results(image_path, timings=None, image_bytes=None, crop=None):
+    """Extracts player data using EasyOCR.
+
+    Readers come from the process-wide pool, so the models are only loaded once.
+    If a `timings` dict is given it is filled with 'model_load' and 'inference' seconds.
+    If the file has already been read, pass its contents as `image_bytes`, or the
+    result of load_cropped_image as `crop`.
+    """
+    # 1. Open and crop the image
+    cropped_img_np = crop if crop is not None else load_cropped_image(image_path, image_bytes=image_bytes)
+
+    # 2. Perform OCR using a warm EasyOCR reader from the pool
+    pool = get_reader_pool()
+    with pool.reader() as lease:
+        start = time.perf_counter()
+        ocr_results = run_ocr(lease.reader, [cropped_img_np])[0]
+        inference_seconds = time.perf_counter() - start
+    pool.record_inference(inference_seconds)
+
+    if timings is not None:
+        timings['model_load'] = lease.load_seconds
+        timings['inference'] = inference_seconds
 
     return ocr_results
 
-def extract_data_easyocr(image_path):
+def extract_data_easyocr(image_path, timings=None, use_cache=True):
     """
     Extracts player data (username, level, class) from an image using EasyOCR,
     relying on the sequential order of text elements after sorting.
+
+    Results are looked up in the persistent OCR cache first (keyed on the image
+    bytes and pipeline parameters), so unchanged screenshots skip OCR entirely.
     """
-    ocr_results = get_ocr_results(image_path)
+    if timings is None:
+        timings = {}
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
 
-    # 1. Process raw results into a DataFrame
-    results_list = []
+    screenshot = open_screenshot(image_path, image_bytes)
+    crop_box = get_screenshot_crop_area(screenshot)
+
+    cache = get_ocr_cache() if use_cache else None
+    if cache is not None:
+        cache_key = make_cache_key(image_bytes, get_cache_params(crop_box))
+        entry = cache.get(cache_key)
+        if entry is not None:
+            timings.update(model_load=0.0, inference=0.0, cache_hit=True)
+            print(f"[Cache] {os.path.basename(image_path)}: hit ({len(entry.rows)} rows)")
+            return entry.rows
+
+    crop = load_cropped_image(screenshot, crop_box=crop_box)
+    ocr_results = get_ocr_results(image_path, timings=timings, crop=crop)
+    timings['cache_hit'] = False
+    print(f"[Timing] {os.path.basename(image_path)}: model load {timings['model_load']:.2f}s, inference {timings['inference']:.2f}s")
+
+    extracted_data = parse_ocr_results(ocr_results)
+    if cache is not None:
+        cache.put(cache_key, ocr_results, extracted_data)
+    artifacts = debug_artifacts.get_artifact_writer()
+    if artifacts is not None:
+        artifacts.submit(_artifact_name(image_path), crop, ocr_results, extracted_data)
+    return extracted_data
+
+def _artifact_name(image, index=0):
+    """File stem of an image's debug artifacts; a hash of the full path keeps same-named files apart."""
+    if isinstance(image, np.ndarray):
+        return f"array_{os.getpid()}_{index}"
+    path_hash = hashlib.sha1(os.path.abspath(image).encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(image))[0]}_{path_hash}"
+
+def _batch_cache_key(image, image_bytes, crop_box):
+    if image_bytes is not None:
+        return make_cache_key(image_bytes, get_cache_params(crop_box))
+    # Arrays are keyed on their pixels, with the shape so differently shaped arrays never collide
+    return make_cache_key(image.tobytes(), dict(get_cache_params(crop_box), array_shape=list(image.shape)))
+
+def extract_data_batch(images, batch_size=DEFAULT_BATCH_SIZE, timings=None, use_cache=True):
+    """
+    Extracts player data from several screenshots, running OCR in batches.
+
+    `images` may hold file paths or RGB screenshot arrays. Crops of the same
+    size are sent to EasyOCR's readtext_batched together, `batch_size` images
+    per call, which keeps the detector and recognizer far busier than one
+    readtext call per image. Cache hits skip OCR as in extract_data_easyocr.
+
+    Returns one list of rows per image, in input order. If `timings` is a list,
+    one timings dict per image is appended to it.
+    """
+    images = list(images)
+    batch_size = max(1, batch_size)
+    results = [None] * len(images)
+    image_timings = [{'model_load': 0.0, 'inference': 0.0, 'cache_hit': False} for _ in images]
+    cache = get_ocr_cache() if use_cache else None
+    artifacts = debug_artifacts.get_artifact_writer()
+    pool = get_reader_pool()
+
+    # Work through the input a window at a time, so only one batch of crops is in memory
+    for window_start in range(0, len(images), batch_size):
+        by_shape = {} # Crop shape -> [(index, crop, cache_key)]
+        for index in range(window_start, min(window_start + batch_size, len(images))):
+            image = images[index]
+            image_bytes = None
+            if not isinstance(image, np.ndarray):
+                with open(image, 'rb') as f:
+                    image_bytes = f.read()
+
+            screenshot = open_screenshot(image, image_bytes)
+            crop_box = get_screenshot_crop_area(screenshot)
+
+            cache_key = None
+            if cache is not None:
+                cache_key = _batch_cache_key(image, image_bytes, crop_box)
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    results[index] = entry.rows
+                    image_timings[index]['cache_hit'] = True
+                    continue
+
+            crop = load_cropped_image(screenshot, crop_box=crop_box)
+            by_shape.setdefault(crop.shape, []).append((index, crop, cache_key))
+
+        # Batched detection needs equally sized images, so batch each crop size separately
+        for group in by_shape.values():
+            with pool.reader() as lease:
+                start = time.perf_counter()
+                batch_results = run_ocr(lease.reader, [crop for _, crop, _ in group])
+                inference_seconds = time.perf_counter() - start
+            pool.record_inference(inference_seconds, images=len(group))
+            print(f"[Timing] Batch of {len(group)}: model load {lease.load_seconds:.2f}s, inference {inference_seconds:.2f}s")
+
+            image_timings[group[0][0]]['model_load'] = lease.load_seconds
+            for (index, crop, cache_key), ocr_results in zip(group, batch_results):
+                image_timings[index].update(inference=inference_seconds / len(group), batch_size=len(group))
+                results[index] = parse_ocr_results(ocr_results)
+                if cache_key is not None:
+                    cache.put(cache_key, ocr_results, results[index])
+                if artifacts is not None:
+                    artifacts.submit(_artifact_name(images[index], index), crop, ocr_results, results[index])
+
+    if timings is not None:
+        timings.extend(image_timings)
+    return results
+
+class OcrBox:
+    """One recognised text box, reduced to its bounds, text and confidence."""
+    __slots__ = ('left', 'top', 'right', 'bottom', 'text', 'conf')
+
+    def __init__(self, left, top, right, bottom, text, conf):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.text = text
+        self.conf = conf
+
+def filter_ocr_boxes(ocr_results, min_confidence=MIN_CONFIDENCE):
+    """Converts EasyOCR (bbox, text, prob) results to OcrBoxes, dropping noise in the same pass."""
+    boxes = []
     for (bbox, text, prob) in ocr_results:
+        text = text.strip()
+        if prob < min_confidence or not text:
+            continue
         tl, tr, br, bl = bbox
-        left = int(min(tl[0], bl[0]))
-        top = int(min(tl[1], tr[1]))
-        # Get vertical center for sorting primarily by line
-        v_center = top + (bottom - top) / 2 if 'bottom' in locals() else top # Handle potential undefined variable
-        results_list.append({
-            'left': left, 
-            'top': top, 
-            'v_center': v_center, # Use v_center for potentially better line grouping
-            'text': text.strip(), 
-            'conf': prob
-        })
-    
-    if not results_list:
+        boxes.append(OcrBox(
+            int(min(tl[0], bl[0])), int(min(tl[1], tr[1])),
+            int(max(tr[0], br[0])), int(max(bl[1], br[1])),
+            text, prob,
+        ))
+    return boxes
+
+def parse_ocr_results(ocr_results):
+    """Turns raw EasyOCR (bbox, text, prob) results into a list of player dicts."""
+    if not ocr_results:
         print("EasyOCR returned no results.")
         return [] 
-        
-    df = pd.DataFrame(results_list)
 
-    # 2. Filter noise 
-    min_confidence = 0.30 
-    df = df[df['conf'] >= min_confidence]
-    df = df[df['text'].str.len() > 0] 
-    
-    if df.empty:
+    # 1. Filter noise while converting the raw results
+    boxes = filter_ocr_boxes(ocr_results)
+    if not boxes:
         print("No text passed confidence threshold.")
         return []
 
-    # 3. Sort by vertical position (approximating lines), then horizontal
-    # Using 'top' directly might be sufficient if v_center calculation was problematic
-    df_sorted = df.sort_values(by=['top', 'left']).reset_index(drop=True)
-    df_sorted = df
-
-    # --- New Logic: Process Tokens Sequentially ---
-    tokens_raw = df_sorted['text'].tolist()
-
-    # Join and re-split to get individual words
-    full_text = " ".join(tokens_raw)
-    tokens = full_text.split(' ')
-    # Filter out empty strings that can result from multiple spaces
-    tokens = [token for token in tokens if token]
-
-    # --- Pre-process Tokens: Merge Multi-word Class Names ---
-    # Create sets for faster lookups (lowercase)
-    classes_lower = {c.lower() for c in CLASSES}
-    two_word_classes = {c.lower() for c in classes_lower if " " in c and len(c.split()) == 2}
-    three_word_classes = {c.lower() for c in classes_lower if " " in c and len(c.split()) == 3} # e.g., Battle Master
-
-    processed_tokens = []
-    i = 0
-    while i < len(tokens):
-        # Check for 3-word classes first
-        if i + 2 < len(tokens):
-            potential_3_word = f"{tokens[i]} {tokens[i+1]} {tokens[i+2]}".lower()
-            if potential_3_word in three_word_classes:
-                # Find original casing from CLASSES list
-                original_class = next((c for c in CLASSES if c.lower() == potential_3_word), f"{tokens[i]} {tokens[i+1]} {tokens[i+2]}")
-                processed_tokens.append(original_class)
-                i += 3
-                continue # Skip to next iteration
-
-        # Check for 2-word classes
-        if i + 1 < len(tokens):
-            potential_2_word = f"{tokens[i]} {tokens[i+1]}".lower()
-            if potential_2_word in two_word_classes:
-                 # Find original casing from CLASSES list
-                original_class = next((c for c in CLASSES if c.lower() == potential_2_word), f"{tokens[i]} {tokens[i+1]}")
-                processed_tokens.append(original_class)
-                i += 2
-                continue # Skip to next iteration
-        
-        # If not part of a multi-word class, add the single token
-        processed_tokens.append(tokens[i])
-        i += 1
-
-    state = "username"
-    data = {'username': '', 'level': 0, 'class': ''}
-    extracted_data = []
-    for index, token in enumerate(processed_tokens):
-        if state == "username":
-            if token.lower().startswith('level'):
-                if index < len(processed_tokens) - 1 and processed_tokens[index + 1].isdigit():
-                    state = "level"
-                else:
-                    state = "class"
-            else:
-                data['username'] += ' ' + token
-        elif state == "level":
-            if token.isdigit():
-                data['level'] = int(token)
-            state = "class"
-        else:
-            data['class'] += token
-
-            if len(data['username']) != 0 and len(data['class']) != 0:
-                 extracted_data.append(data)
-            else:
-                print(f"[Warning] Could not extract complete data: U='{data['username']}', L={data['level']}, C='{data['class']}'")    
-
-            data = {'username': '', 'level': 0, 'class': ''}
+    # 2. Group the boxes into text lines by their position on the screenshot
+    lines = card_layout.group_lines(boxes)
 
-            state = "username"
+    # 3. Split the lines into ally cards by the gaps between them, and read
+    # username, level and class from every card independently. Class names
+    # are snapped to the vocabulary, so OCR misreads (e.g. "Valkyrle") are fixed.
+    extracted_data = card_layout.parse_cards(lines, CLASS_VOCABULARY)
 
     return extracted_data # Return the list (potentially empty)
 
 
-# Example usage (for testing):
+# Command line usage: python ocr_processor.py [--batch-size N] image [image ...]
 if __name__ == '__main__':
-    # Use the actual image path provided
-    # test_image_path = 'images/Screenshot_2025-03-31-09-44-48-24_fba058fbcaeda824c55dd11029f3cefb.jpg' # First image
-    test_image_path = 'images/Screenshot_2025-03-31-10-43-07-78_fba058fbcaeda824c55dd11029f3cefb.jpg' # Second image
-    if os.path.exists(test_image_path):
-        print(f"\n--- Processing with EasyOCR ({test_image_path}) ---")
-        # Ensure we call the NEW function
-        data_easyocr = extract_data_easyocr(test_image_path) 
-        print("\n--- Extracted Data (EasyOCR - Sequential - Final) ---") # Updated title
-        if data_easyocr:
-            for item in data_easyocr:
+    import argparse
+    parser = argparse.ArgumentParser(description="Extract username, level and class from Orna allies screenshots.")
+    parser.add_argument('images', nargs='+', help="Screenshot files")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Images per OCR batch")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the OCR result cache")
+    parser.add_argument('--debug-artifacts', metavar='DIR', help="Write crops, box overlays and parsed rows to DIR")
+    args = parser.parse_args()
+    if args.debug_artifacts:
+        debug_artifacts.enable(args.debug_artifacts)
+
+    image_paths = [path for path in args.images if os.path.isfile(path)]
+    for path in args.images:
+        if path not in image_paths:
+            print(f"Image not found: {path}")
+
+    all_rows = extract_data_batch(image_paths, batch_size=args.batch_size, use_cache=not args.no_cache)
+    for path, rows in zip(image_paths, all_rows):
+        print(f"\n--- {path} ---")
+        if rows:
+            for item in rows:
                 print(item)
         else:
-            print("No data extracted.") # Updated message
-            
-    else:
-        print(f"Test image not found: {test_image_path}")
-        print("Skipping direct execution example.")
+            print("No data extracted.")
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+import card_template
+
+CONTRAST_MODES = ('none', 'stretch', 'clahe')
+THRESHOLD_MODES = ('none', 'otsu', 'adaptive')
+
+# Crops are only resized when the scale is further than this from 1.0
+RESCALE_TOLERANCE = 0.1
+# Scale limits, so a bad text height estimate cannot blow up or wipe out the crop
+MIN_SCALE = 0.25
+MAX_SCALE = 4.0
+# Adaptive threshold neighbourhood (odd, px) and offset
+ADAPTIVE_BLOCK_SIZE = 31
+ADAPTIVE_OFFSET = 10
+
+
+class PreprocessSettings:
+    """What to do to the cropped player list before OCR.
+
+    contrast, threshold and denoise work on a single channel, so any of them
+    implies grayscale. A text_height of 0 keeps the crop's resolution.
+    """
+
+    def __init__(self, grayscale=False, text_height=0, contrast='none', threshold='none', denoise=False):
+        if contrast not in CONTRAST_MODES:
+            raise ValueError(f"Unknown contrast mode '{contrast}', expected one of {CONTRAST_MODES}")
+        if threshold not in THRESHOLD_MODES:
+            raise ValueError(f"Unknown threshold mode '{threshold}', expected one of {THRESHOLD_MODES}")
+        self.text_height = max(0, int(text_height))
+        self.contrast = contrast
+        self.threshold = threshold
+        self.denoise = bool(denoise)
+        self.grayscale = bool(grayscale) or contrast != 'none' or threshold != 'none' or self.denoise
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Parses a comma separated spec such as "gray,height=32,clahe,otsu,denoise".
+
+        An empty spec (or "none") leaves crops untouched.
+        """
+        settings = {}
+        for part in (part.strip().lower() for part in spec.split(',')):
+            if part in ('', 'none'):
+                continue
+            if part in ('gray', 'grey', 'grayscale'):
+                settings['grayscale'] = True
+            elif part.startswith('height='):
+                settings['text_height'] = int(part[len('height='):])
+            elif part in CONTRAST_MODES:
+                settings['contrast'] = part
+            elif part in THRESHOLD_MODES:
+                settings['threshold'] = part
+            elif part == 'denoise':
+                settings['denoise'] = True
+            else:
+                raise ValueError(f"Unknown preprocessing option '{part}'")
+        return cls(**settings)
+
+    @property
+    def is_identity(self):
+        return not self.grayscale and not self.text_height
+
+    def to_params(self):
+        """JSON-friendly form, for the OCR cache key."""
+        return {
+            'grayscale': self.grayscale,
+            'text_height': self.text_height,
+            'contrast': self.contrast,
+            'threshold': self.threshold,
+            'denoise': self.denoise,
+        }
+
+    def __str__(self):
+        parts = ['gray'] if self.grayscale else []
+        if self.text_height:
+            parts.append(f"height={self.text_height}")
+        parts += [mode for mode in (self.contrast, self.threshold) if mode != 'none']
+        if self.denoise:
+            parts.append('denoise')
+        return ','.join(parts) or 'none'
+
+
+def estimate_text_height(gray):
+    """Median height (px) of the text bands in a grayscale crop, or 0 if none are found."""
+    starts, ends = card_template.text_bands(card_template.text_mask(gray))
+    if not len(starts):
+        return 0
+    return float(np.median(ends - starts))
+
+
+_clahe = None
+
+def _get_clahe():
+    global _clahe
+    if _clahe is None:
+        _clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return _clahe
+
+
+def preprocess(crop, settings):
+    """Applies `settings` to a cropped screenshot array and returns the result.
+
+    Each step writes into the previous step's output when that buffer is ours,
+    so a full pipeline allocates about one buffer per resolution change. The
+    input array itself is never modified.
+    """
+    if settings.is_identity:
+        return crop
+
+    image = crop
+    gray = card_template.to_gray(crop) if settings.grayscale or settings.text_height else None
+    if settings.grayscale:
+        image = gray
+
+    if settings.text_height:
+        current_height = estimate_text_height(gray)
+        if current_height:
+            scale = min(MAX_SCALE, max(MIN_SCALE, settings.text_height / current_height))
+            if abs(scale - 1.0) > RESCALE_TOLERANCE:
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    if not settings.grayscale:
+        return image
+
+    owned = image is not crop # Only modify buffers allocated here
+    if settings.denoise:
+        image = cv2.medianBlur(image, 3)
+        owned = True
+    if settings.contrast == 'stretch':
+        image = cv2.normalize(image, image if owned else None, 0, 255, cv2.NORM_MINMAX)
+    elif settings.contrast == 'clahe':
+        image = _get_clahe().apply(image)
+    owned = owned or settings.contrast != 'none'
+    if settings.threshold == 'otsu':
+        _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=image if owned else None)
+    elif settings.threshold == 'adaptive':
+        image = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                      ADAPTIVE_BLOCK_SIZE, ADAPTIVE_OFFSET)
+    return image
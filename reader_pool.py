@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+import time
+
+# Number of warm readers kept alive per process. Each reader holds its own copy
+# of the detector/recognizer weights, so keep this small on CPU-only machines.
+DEFAULT_POOL_SIZE = int(os.environ.get("ORNA_OCR_READERS", "1"))
+
+
+class ReaderLease:
+    """A reader checked out from the pool, plus how long it took to obtain."""
+
+    def __init__(self, reader, load_seconds):
+        self.reader = reader
+        self.load_seconds = load_seconds # 0.0 when a warm reader was reused
+
+
+class ReaderPool:
+    """Bounded pool of warm EasyOCR readers shared by every caller in the process.
+
+    Models are loaded lazily the first time a reader is needed and then kept for
+    the lifetime of the process. At most `size` readers are ever created; extra
+    callers block until a reader is returned to the pool.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, languages=('en',), gpu=False):
+        self.size = max(1, size)
+        self.languages = list(languages)
+        self.gpu = gpu
+        self._idle = queue.LifoQueue() # LIFO keeps the most recently used reader hot
+        self._created = 0
+        self._lock = threading.Lock()
+
+        # Timing counters (seconds)
+        self.model_load_seconds = 0.0
+        self.inference_seconds = 0.0
+        self.images_processed = 0
+
+    def _create_reader(self):
+        """Loads the EasyOCR models and returns a new reader."""
+        start = time.perf_counter()
+        import easyocr # Pulls in torch, so it is imported with the first reader, not at startup
+        reader = easyocr.Reader(self.languages, gpu=self.gpu)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.model_load_seconds += elapsed
+        print(f"[ReaderPool] Loaded EasyOCR models in {elapsed:.2f}s ({self._created}/{self.size} readers)")
+        return reader, elapsed
+
+    def acquire(self, timeout=None):
+        """Checks out a reader, creating one if the pool is not yet full."""
+        try:
+            return ReaderLease(self._idle.get_nowait(), 0.0)
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1 # Reserve the slot before the (slow) model load
+        if can_create:
+            try:
+                reader, elapsed = self._create_reader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            return ReaderLease(reader, elapsed)
+
+        # Pool is full, wait for another caller to release a reader
+        return ReaderLease(self._idle.get(timeout=timeout), 0.0)
+
+    def release(self, lease):
+        """Returns a reader to the pool."""
+        self._idle.put(lease.reader)
+
+    def reader(self, timeout=None):
+        """Context manager form of acquire()/release()."""
+        return _PooledReader(self, timeout)
+
+    def record_inference(self, seconds, images=1):
+        """Adds the inference time of one image (or a batch of `images`) to the pool counters."""
+        with self._lock:
+            self.inference_seconds += seconds
+            self.images_processed += images
+
+    def warm_up(self):
+        """Loads at least one reader so the first image does not pay the model load."""
+        lease = self.acquire()
+        self.release(lease)
+
+    def stats(self):
+        """Returns a snapshot of the timing counters."""
+        with self._lock:
+            images = self.images_processed
+            return {
+                'readers': self._created,
+                'size': self.size,
+                'model_load_seconds': self.model_load_seconds,
+                'inference_seconds': self.inference_seconds,
+                'images_processed': images,
+                'avg_inference_seconds': self.inference_seconds / images if images else 0.0,
+            }
+
+
+class _PooledReader:
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.lease = None
+
+    def __enter__(self):
+        self.lease = self.pool.acquire(timeout=self.timeout)
+        return self.lease
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool.release(self.lease)
+        return False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_reader_pool():
+    """Returns the process-wide reader pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ReaderPool()
+    return _pool
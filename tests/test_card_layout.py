@@ -0,0 +1,60 @@
+import card_layout
+import class_vocab
+
+VOCABULARY = class_vocab.ClassVocabulary(["Mage", "Thief", "Valkyrie", "Grand Summoner Auriga"])
+
+
+class Box:
+    def __init__(self, left, top, text, height=20):
+        self.left = left
+        self.top = top
+        self.right = left + 10 * len(text)
+        self.bottom = top + height
+        self.text = text
+
+
+def card_boxes(top, *lines):
+    """Boxes for one card: each line is a list of words, 30px apart, words 100px apart."""
+    return [Box(100 * i, top + 30 * n, word) for n, words in enumerate(lines) for i, word in enumerate(words)]
+
+
+def parse(boxes):
+    return card_layout.parse_cards(card_layout.group_lines(boxes), VOCABULARY)
+
+
+def test_group_lines_orders_words_left_to_right():
+    boxes = [Box(200, 2, "Mage"), Box(0, 0, "Level"), Box(100, 1, "212"), Box(0, 40, "PlayerTwo")]
+    lines = card_layout.group_lines(boxes)
+    assert [line.words for line in lines] == [["Level", "212", "Mage"], ["PlayerTwo"]]
+
+
+def test_cards_are_parsed_independently():
+    boxes = (card_boxes(0, ["PlayerOne"], ["Level", "212", "Mage"])
+             + card_boxes(100, ["PlayerTwo"], ["Level", "150"], ["Thief"]))
+    assert parse(boxes) == [
+        {'username': 'PlayerOne', 'level': 212, 'class': 'Mage'},
+        {'username': 'PlayerTwo', 'level': 150, 'class': 'Thief'},
+    ]
+
+
+def test_missing_level_label_does_not_merge_cards():
+    boxes = (card_boxes(0, ["PlayerOne"], ["212", "Mage"])
+             + card_boxes(100, ["PlayerTwo"], ["Level", "150", "Thief"]))
+    assert parse(boxes) == [
+        {'username': 'PlayerOne', 'level': 212, 'class': 'Mage'},
+        {'username': 'PlayerTwo', 'level': 150, 'class': 'Thief'},
+    ]
+
+
+def test_inline_level_and_misread_class():
+    boxes = (card_boxes(0, ["Player", "One"], ["Level212", "Valkyrle"])
+             + card_boxes(100, ["PlayerTwo"], ["Level:", "7", "Grand", "Summoner", "Aurlga"]))
+    assert parse(boxes) == [
+        {'username': 'Player One', 'level': 212, 'class': 'Valkyrie'},
+        {'username': 'PlayerTwo', 'level': 7, 'class': 'Grand Summoner Auriga'},
+    ]
+
+
+def test_incomplete_card_is_skipped():
+    boxes = card_boxes(0, ["PlayerOne"], ["Level", "212"]) + card_boxes(100, ["PlayerTwo"], ["Level", "150", "Thief"])
+    assert parse(boxes) == [{'username': 'PlayerTwo', 'level': 150, 'class': 'Thief'}]
@@ -0,0 +1,59 @@
+import pytest
+import class_vocab
+
+VOCABULARY = class_vocab.ClassVocabulary(["Mage", "Valkyrie", "Grand Summoner", "Grand Summoner Auriga",
+                                          " Omnimancer Antlia, Omnimagus Antlia", "mage"])
+
+
+def test_names_are_normalised():
+    assert VOCABULARY.names == ["Mage", "Valkyrie", "Grand Summoner", "Grand Summoner Auriga",
+                                "Omnimancer Antlia", "Omnimagus Antlia"]
+    assert "valkyrie" in VOCABULARY
+    assert VOCABULARY.canonical("GRAND SUMMONER") == "Grand Summoner"
+
+
+def test_correct_exact():
+    assert VOCABULARY.correct("  valkyrie ") == ("Valkyrie", 1.0)
+
+
+def test_correct_one_edit():
+    assert VOCABULARY.correct("Valkyrle") == ("Valkyrie", pytest.approx(1 - 1 / 8))
+    assert VOCABULARY.correct("Vaklyrie") == ("Valkyrie", pytest.approx(1 - 1 / 8)) # Transposition
+
+
+def test_correct_two_edits():
+    assert VOCABULARY.correct("Vaikyrle") == ("Valkyrie", pytest.approx(1 - 2 / 8))
+
+
+def test_correct_no_match():
+    assert VOCABULARY.correct("Dragon") == (None, 0.0)
+    assert VOCABULARY.correct("Valkyxxxe") == (None, 0.0) # Three edits
+    assert VOCABULARY.correct("") == (None, 0.0)
+
+
+def test_correct_respects_min_match_score():
+    # Two edits in a four letter word is within MAX_EDIT_DISTANCE but scores only 0.5
+    assert 1 - 2 / 4 < class_vocab.MIN_MATCH_SCORE
+    assert VOCABULARY.correct("Mxge") == ("Mage", pytest.approx(0.75))
+    assert VOCABULARY.correct("Mxxe") == (None, 0.0)
+
+
+def test_correct_is_cached_by_normalised_text():
+    vocabulary = class_vocab.ClassVocabulary(["Valkyrie"])
+    first = vocabulary.correct("Valkyrle")
+    assert vocabulary.correct("  VALKYRLE ") == first
+    assert vocabulary._cached_correction.cache_info().hits == 1
+
+
+def test_longest_match_prefers_longer_classes():
+    tokens = "grand summoner auriga Level 12".split()
+    assert VOCABULARY.longest_match(tokens, 0) == ("Grand Summoner Auriga", 3)
+    assert VOCABULARY.longest_match("Grand Summoner 12".split(), 0) == ("Grand Summoner", 2)
+    assert VOCABULARY.longest_match(tokens, 3) == (None, 0)
+
+
+def test_match_class_fixes_misread_multi_word_class():
+    assert VOCABULARY.match_class("Grand Summoner Aurlga".split(), 0) == \
+        ("Grand Summoner Auriga", 3, pytest.approx(1 - 1 / 21))
+    assert VOCABULARY.match_class("Grand Summoner xyz".split(), 0) == ("Grand Summoner", 2, 1.0)
+    assert VOCABULARY.match_class(["Dragon"], 0) == (None, 0, 0.0)
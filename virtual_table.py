@@ -0,0 +1,242 @@
+import collections
+import tkinter as tk
+from tkinter import ttk
+
+# Rows are fetched from the row source this many at a time
+PAGE_SIZE = 100
+# Pages kept in memory per row source (least recently used pages are dropped)
+MAX_CACHED_PAGES = 50
+# Used until the real row height can be measured from a rendered row
+DEFAULT_ROW_HEIGHT = 20
+DEFAULT_HEADING_HEIGHT = 24
+
+
+class PagedRowSource:
+    """Random access to a sorted query result, fetched a page at a time.
+
+    `fetch(offset, limit, reverse, after=None)` must return `limit` rows
+    starting at `offset` in the source's order, or in the exact reverse order
+    when `reverse` is true. If `after` is a row, the rows instead start right
+    after it (in the fetch direction) and `offset` is 0. `count()` returns the
+    total number of rows.
+
+    A page next to a cached one continues from that page's edge row, so
+    scrolling never makes the database skip rows. Other pages (a jump with the
+    scrollbar) are fetched by offset from the nearer end of the result.
+    """
+
+    def __init__(self, fetch, count, page_size=PAGE_SIZE, max_pages=MAX_CACHED_PAGES):
+        self._fetch = fetch
+        self._count = count
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = collections.OrderedDict() # page number -> rows
+        self._length = None
+
+    def __len__(self):
+        if self._length is None:
+            self._length = self._count()
+        return self._length
+
+    def invalidate(self):
+        """Forgets cached pages and the row count, e.g. after the underlying data changed."""
+        self._pages.clear()
+        self._length = None
+
+    def _page(self, number):
+        rows = self._pages.get(number)
+        if rows is not None:
+            self._pages.move_to_end(number)
+            return rows
+
+        offset = number * self.page_size
+        total = len(self)
+        limit = min(self.page_size, total - offset)
+        previous_page = self._pages.get(number - 1)
+        next_page = self._pages.get(number + 1)
+        if previous_page:
+            rows = self._fetch(0, limit, False, after=previous_page[-1])
+        elif next_page:
+            rows = self._fetch(0, limit, True, after=next_page[0])[::-1]
+        elif offset > total // 2:
+            rows = self._fetch(total - offset - limit, limit, True)[::-1]
+        else:
+            rows = self._fetch(offset, limit, False)
+        self._pages[number] = rows
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
+
+    def rows(self, start, stop):
+        """Returns rows start..stop-1 (fewer at the end of the result)."""
+        stop = min(stop, len(self))
+        result = []
+        index = max(0, start)
+        while index < stop:
+            number, first = divmod(index, self.page_size)
+            page = self._page(number)
+            if not page:
+                break
+            taken = page[first:first + stop - index]
+            result.extend(taken)
+            index += len(taken)
+        return result
+
+
+class VirtualTreeview:
+    """A ttk.Treeview that only ever holds the rows visible in its viewport.
+
+    Rows come from a PagedRowSource; `format_row` turns a source row into the
+    tuple of displayed values and `row_key` into a stable identity (e.g. the
+    database id) so a selection survives scrolling. The scrollbar is driven
+    by the source's length rather than by Treeview items, so scrolling,
+    sorting and filtering cost the same at a hundred rows as at a million.
+    `on_select(row)` is called when the user selects a different row.
+    """
+
+    def __init__(self, parent, columns, format_row, row_key, on_select=None):
+        self.format_row = format_row
+        self.row_key = row_key
+        self.on_select = on_select
+        self.source = None
+        self.top = 0 # Index of the first visible row
+        self.visible_rows = 1
+        self._row_height = DEFAULT_ROW_HEIGHT
+        self._heading_height = DEFAULT_HEADING_HEIGHT
+        self._item_rows = {} # Treeview item id -> source row
+        self._selected_key = None
+        self._render_pending = None # after_idle id while a redraw is scheduled
+
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+        self.tree = ttk.Treeview(self.frame, columns=columns, displaycolumns=columns, show='headings',
+                                 selectmode='browse')
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.top - 3) or 'break') # Linux wheel up
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.top + 3) or 'break') # Linux wheel down
+        self.tree.bind('<Prior>', lambda e: self.scroll_to(self.top - self.visible_rows) or 'break')
+        self.tree.bind('<Next>', lambda e: self.scroll_to(self.top + self.visible_rows) or 'break')
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0) or 'break')
+        self.tree.bind('<End>', lambda e: self.scroll_to(self.total_rows) or 'break')
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    @property
+    def total_rows(self):
+        return len(self.source) if self.source is not None else 0
+
+    def set_source(self, source, keep_position=False):
+        """Shows a new row source (e.g. after a filter or sort change)."""
+        self.source = source
+        if not keep_position:
+            self.top = 0
+        self.render()
+
+    def refresh(self):
+        """Re-reads the current source (after the data changed) and redraws, keeping the position."""
+        if self.source is not None:
+            self.source.invalidate()
+        self.top = max(0, min(self.top, self.total_rows - self.visible_rows)) # The result may have shrunk
+        self.render()
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), self.total_rows - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            # Redraw once the pending events are handled, so dragging the
+            # scrollbar only fetches the rows for where it ends up
+            if self._render_pending is None:
+                self._render_pending = self.tree.after_idle(self.render)
+
+    def render(self):
+        """Fills the Treeview with the rows of the viewport, reusing existing items."""
+        if self._render_pending is not None:
+            self.tree.after_cancel(self._render_pending)
+            self._render_pending = None
+        rows = self.source.rows(self.top, self.top + self.visible_rows) if self.source is not None else []
+        items = list(self.tree.get_children())
+        for item in items[len(rows):]:
+            self.tree.delete(item)
+        self._item_rows = {}
+        selected_item = None
+        for index, row in enumerate(rows):
+            values = self.format_row(row)
+            if index < len(items):
+                item = items[index]
+                self.tree.item(item, values=values)
+            else:
+                item = self.tree.insert('', tk.END, values=values)
+            self._item_rows[item] = row
+            if self._selected_key is not None and self.row_key(row) == self._selected_key:
+                selected_item = item
+
+        # Keep the highlight on the selected row, wherever it is now shown
+        current = self.tree.selection()
+        if selected_item is None and current:
+            self.tree.selection_remove(current)
+        elif selected_item is not None and current != (selected_item,):
+            self.tree.selection_set(selected_item)
+
+        total = self.total_rows
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._measure_rows(rows)
+
+    def _measure_rows(self, rows):
+        """Picks up the real row and heading height once a row is on screen."""
+        if not rows:
+            return
+        first_item = self.tree.get_children()[0]
+        bbox = self.tree.bbox(first_item)
+        if bbox and bbox[3] > 0 and (bbox[3], bbox[1]) != (self._row_height, self._heading_height):
+            self._row_height, self._heading_height = bbox[3], bbox[1]
+            self._on_configure()
+
+    def _on_configure(self, event=None):
+        height = event.height if event is not None else self.tree.winfo_height()
+        visible_rows = max(1, (height - self._heading_height) // self._row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.top = max(0, min(self.top, self.total_rows - self.visible_rows))
+            self.render()
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            self.scroll_to(float(args[0]) * self.total_rows)
+        elif action == 'scroll':
+            amount, unit = int(args[0]), args[1]
+            self.scroll_to(self.top + amount * (self.visible_rows if unit == 'pages' else 1))
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch; macOS reports small deltas
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.top - 3 * steps)
+        return 'break'
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._item_rows:
+            return # Cleared while scrolling; the selected row is just out of view
+        row = self._item_rows[selection[0]]
+        key = self.row_key(row)
+        if key == self._selected_key:
+            return # Re-highlighted after scrolling, not a new selection
+        self._selected_key = key
+        if self.on_select is not None:
+            self.on_select(row)
+
+    def heading(self, column, **options):
+        self.tree.heading(column, **options)
+
+    def column(self, column, **options):
+        self.tree.column(column, **options)